@@ -0,0 +1,110 @@
+import numpy as np
+import scipy.signal
+import soundfile as sf
+from fractions import Fraction
+from PyQt5.QtCore import QObject, pyqtSignal
+from AnalysisCache import JsonCache, file_hash
+from BackgroundTasks import TaskRelay, process_pool
+
+ENVELOPE_RATE = 1000  # Hz, the coarse search runs on amplitude envelopes at this rate
+REFINE_SECONDS = 1.0  # Length of the full-rate window used to refine the coarse lag
+MIN_CORRELATION = 0.3  # Weaker envelope matches are treated as unrelated recordings
+
+
+def read_mono(path, sr=None):
+    """Channel-averaged samples of a file, resampled to `sr` when given."""
+    y, file_sr = sf.read(path, dtype='float32', always_2d=True)
+    y = y.mean(axis=1)
+    if sr is not None and sr != file_sr:
+        ratio = Fraction(int(sr), int(file_sr)).limit_denominator(1000)
+        y = scipy.signal.resample_poly(y, ratio.numerator, ratio.denominator).astype(np.float32)
+        file_sr = sr
+    return y, file_sr
+
+
+def envelope(y, factor):
+    # Mean absolute amplitude per block, a cheap decimation that keeps the syllable structure
+    blocks = len(y) // factor
+    env = np.abs(y[:blocks * factor]).reshape(blocks, factor).mean(axis=1)
+    return env - env.mean()
+
+
+def coarse_lag(reference, take, factor):
+    """Lag of `take` against `reference` in samples, to within one envelope block, and its correlation."""
+    a = envelope(reference, factor)
+    b = envelope(take, factor)
+    if len(a) == 0 or len(b) == 0:
+        return 0, 0.0
+    correlation = scipy.signal.correlate(b, a, mode='full', method='fft')
+    peak = int(np.argmax(correlation))
+    norm = np.sqrt(np.dot(a, a) * np.dot(b, b))
+    score = float(correlation[peak] / norm) if norm > 0 else 0.0
+    return (peak - (len(a) - 1)) * factor, score
+
+
+def refine_lag(reference, take, lag, sr, search):
+    """Full-rate lag within `search` samples of a coarse estimate, using the loudest second of the reference."""
+    width = min(int(REFINE_SECONDS * sr), len(reference))
+    if width == 0:
+        return lag
+    energy = np.concatenate([[0.0], np.cumsum(reference.astype(np.float64) ** 2)])
+    starts = np.arange(0, len(reference) - width + 1, max(1, width // 16))
+    start = int(starts[np.argmax(energy[starts + width] - energy[starts])])
+    first = start + lag - search
+    if first < 0 or first + width + 2 * search > len(take):
+        return lag  # The window falls off the take, keep the coarse estimate
+    segment = reference[start:start + width]
+    window = take[first:first + width + 2 * search]
+    correlation = scipy.signal.correlate(window, segment, mode='valid', method='fft')
+    return lag - search + int(np.argmax(correlation))
+
+
+def pair_offset(reference_path, path):
+    """Seconds by which the recording at `path` lags the reference recording.
+
+    The lag is found by FFT cross-correlation of decimated envelopes and then
+    refined at the full sample rate around that estimate. Unrelated recordings
+    give an offset of zero.
+    """
+    reference, sr = read_mono(reference_path)
+    take, _ = read_mono(path, sr)
+    factor = max(1, sr // ENVELOPE_RATE)
+    lag, score = coarse_lag(reference, take, factor)
+    if score < MIN_CORRELATION:
+        return 0.0, score
+    lag = refine_lag(reference, take, lag, sr, 2 * factor)
+    return lag / sr, score
+
+
+class Aligner(QObject):
+    """Cached, pooled alignment of recordings against a reference take."""
+
+    aligned = pyqtSignal(str, float)  # key, offset in seconds
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cache = JsonCache('alignment')
+        self.relay = TaskRelay(self)
+        self.relay.finished.connect(self.store)
+        self.relay.failed.connect(lambda tag, error: print(f"Alignment failed for {tag[0]}: {error}"))
+        self.generation = 0  # Bumped by reset, results requested before it are cached but not announced
+
+    def request(self, key, reference_path, path):
+        pair = f"{file_hash(reference_path)}_{file_hash(path)}"
+        cached = self.cache.get(pair)
+        if cached is not None:
+            self.aligned.emit(key, cached['offset'])
+        else:
+            self.relay.submit((key, pair, self.generation), process_pool(), pair_offset, reference_path, path)
+
+    def reset(self):
+        # Keys are reused when files are reloaded, an offset still in flight belongs to the old session
+        self.generation += 1
+
+    def store(self, tag, result):
+        key, pair, generation = tag
+        offset, score = result
+        self.cache.put(pair, {'offset': offset, 'score': score})
+        self.cache.save()
+        if generation == self.generation:
+            self.aligned.emit(key, offset)
@@ -0,0 +1,72 @@
+import os
+import json
+import hashlib
+import threading
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.hyperx_comparison_cache')
+HASH_SAMPLE_BYTES = 1 << 20  # Bytes read from each end of a file when fingerprinting
+
+_hash_memo = {}
+_hash_lock = threading.Lock()
+
+
+def cache_path(*parts):
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def file_hash(path):
+    """Content fingerprint of a file that survives renames and copies.
+
+    Hashes the size plus the first and last megabyte, which is enough to tell
+    recordings apart without reading whole files just to look up a cache entry.
+    The result is memoised per (path, size, mtime).
+    """
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _hash_lock:
+        if memo_key in _hash_memo:
+            return _hash_memo[memo_key]
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(stat.st_size).encode())
+    with open(path, 'rb') as handle:
+        digest.update(handle.read(HASH_SAMPLE_BYTES))
+        if stat.st_size > 2 * HASH_SAMPLE_BYTES:
+            handle.seek(-HASH_SAMPLE_BYTES, os.SEEK_END)
+            digest.update(handle.read(HASH_SAMPLE_BYTES))
+    result = digest.hexdigest()
+
+    with _hash_lock:
+        _hash_memo[memo_key] = result
+    return result
+
+
+class JsonCache:
+    """Small persistent key/value store for per-file analysis results."""
+
+    def __init__(self, name):
+        self.path = cache_path(f"{name}.json")
+        self.lock = threading.Lock()
+        try:
+            with open(self.path, 'r') as handle:
+                self.data = json.load(handle)
+        except (OSError, ValueError):
+            self.data = {}
+
+    def get(self, key):
+        with self.lock:
+            return self.data.get(key)
+
+    def put(self, key, value):
+        with self.lock:
+            self.data[key] = value
+
+    def save(self):
+        with self.lock:
+            snapshot = json.dumps(self.data)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as handle:
+            handle.write(snapshot)
+        os.replace(temp_path, self.path)  # Never leave a half-written cache behind
@@ -0,0 +1,170 @@
+import numpy as np
+import soundfile as sf
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont
+from AnalysisCache import JsonCache, file_hash
+from BackgroundTasks import TaskRelay, process_pool
+
+FONT_FAMILY = 'Forma DJR Micro'
+FONT_SIZE = 10
+
+NOISE_BLOCK_SECONDS = 0.05  # Short-term RMS blocks used for the noise floor estimate
+NOISE_PERCENTILE = 10  # The noise floor is the level the quietest 10% of blocks stay under
+BLOCKS_PER_READ = 200
+CLIP_LEVEL = 0.999  # Samples at or above this magnitude count as clipped
+SILENCE_DB = -120.0
+
+# (result key, column title, display format)
+COLUMNS = [
+    ('duration', 'Duration (s)', '{:.2f}'),
+    ('sample_rate', 'Sample Rate', '{:.0f}'),
+    ('channels', 'Channels', '{:.0f}'),
+    ('peak', 'Peak (dBFS)', '{:.1f}'),
+    ('rms', 'RMS (dBFS)', '{:.1f}'),
+    ('crest', 'Crest (dB)', '{:.1f}'),
+    ('dc_offset', 'DC Offset', '{:+.5f}'),
+    ('clipped', 'Clipped Samples', '{:.0f}'),
+    ('noise_floor', 'Noise Floor (dBFS)', '{:.1f}'),
+]
+
+
+def to_db(value, power=False):
+    with np.errstate(divide='ignore'):
+        db = (10 if power else 20) * np.log10(value)
+    return float(max(db, SILENCE_DB))
+
+
+def file_stats(path):
+    """Level statistics of a recording, read in blocks so memory use is independent of its length."""
+    info = sf.info(path)
+    block = max(1, int(NOISE_BLOCK_SECONDS * info.samplerate))
+    peak = 0.0
+    energy = 0.0
+    sums = np.zeros(info.channels)
+    clipped = 0
+    frames = 0
+    block_powers = []
+    for chunk in sf.blocks(path, blocksize=block * BLOCKS_PER_READ, dtype='float32', always_2d=True):
+        magnitude = np.abs(chunk)
+        peak = max(peak, float(magnitude.max(initial=0.0)))
+        clipped += int(np.count_nonzero(magnitude >= CLIP_LEVEL))
+        energy += float(np.einsum('ij,ij->', chunk, chunk, dtype=np.float64))
+        sums += chunk.sum(axis=0, dtype=np.float64)
+        frames += chunk.shape[0]
+        whole = chunk.shape[0] // block * block  # Reads are a whole number of blocks except at the end
+        if whole:
+            block_powers.append((chunk[:whole].reshape(-1, block, info.channels) ** 2).mean(axis=(1, 2)))
+
+    samples = frames * info.channels
+    rms = to_db(energy / samples, power=True) if samples else SILENCE_DB
+    peak_db = to_db(peak)
+    block_powers = np.concatenate(block_powers) if block_powers else np.zeros(0)
+    return {
+        'duration': frames / info.samplerate,
+        'sample_rate': info.samplerate,
+        'channels': info.channels,
+        'peak': peak_db,
+        'rms': rms,
+        'crest': peak_db - rms,
+        'dc_offset': float(sums[np.argmax(np.abs(sums))] / frames) if frames else 0.0,  # Largest channel mean
+        'clipped': clipped,
+        'noise_floor': to_db(np.percentile(block_powers, NOISE_PERCENTILE), power=True) if block_powers.size else SILENCE_DB,
+    }
+
+
+class NumericItem(QTableWidgetItem):
+    """Table cell that shows formatted text but sorts by its numeric value."""
+
+    def __init__(self, value, text):
+        super().__init__(text)
+        self.setData(Qt.UserRole, value)
+        self.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+
+    def __lt__(self, other):
+        return self.data(Qt.UserRole) < other.data(Qt.UserRole)
+
+
+class StatsWindow(QWidget):
+    """Sortable table of level statistics for every loaded recording.
+
+    Files are measured in the process pool and results are cached by file hash,
+    so rows fill in as they finish and reopening the table is instant.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Audio Statistics")
+        self.resize(1100, 600)
+        self.setFont(QFont(FONT_FAMILY, FONT_SIZE))
+        self.cache = JsonCache('stats')
+        self.relay = TaskRelay(self)
+        self.relay.finished.connect(self.store)
+        self.relay.failed.connect(self.report_failure)
+        self.rows = {}  # file path -> name item, which tracks its row through sorting
+        self.pending = set()
+
+        self.table = QTableWidget(0, len(COLUMNS) + 1)
+        self.table.setHorizontalHeaderLabels(['File'] + [title for _, title, _ in COLUMNS])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSortingEnabled(True)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.table)
+
+    def set_files(self, file_paths):
+        """Show a row per (display name, path) pair, measuring the files not seen before."""
+        for display_name, path in file_paths:
+            if path in self.rows:
+                continue
+            self.add_row(display_name, path)
+            if path in self.pending:
+                continue  # Still being measured for an earlier request
+            digest = file_hash(path)
+            cached = self.cache.get(digest)
+            if cached is not None:
+                self.fill_row(path, cached)
+            else:
+                self.pending.add(path)
+                self.relay.submit((path, digest), process_pool(), file_stats, path)
+
+    def add_row(self, display_name, path):
+        self.table.setSortingEnabled(False)  # Rows would move while being filled in otherwise
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        name_item = QTableWidgetItem(display_name)
+        name_item.setToolTip(path)
+        name_item.setData(Qt.UserRole, path)
+        self.table.setItem(row, 0, name_item)
+        self.rows[path] = name_item
+        self.table.setSortingEnabled(True)
+
+    def fill_row(self, path, result):
+        row = self.rows[path].row()  # Rows move when sorted, the name item knows where it is
+        self.table.setSortingEnabled(False)
+        for column, (key, _, text_format) in enumerate(COLUMNS, start=1):
+            self.table.setItem(row, column, NumericItem(result[key], text_format.format(result[key])))
+        self.table.setSortingEnabled(True)
+
+    def store(self, tag, result):
+        path, digest = tag
+        self.pending.discard(path)
+        self.cache.put(digest, result)
+        if not self.pending:
+            self.cache.save()  # One write per batch rather than per file
+        if path in self.rows:
+            self.fill_row(path, result)
+
+    def report_failure(self, tag, error):
+        path, _ = tag
+        self.pending.discard(path)
+        print(f"Statistics failed for {path}: {error}")
+        if not self.pending:
+            self.cache.save()  # The files that did finish are still worth keeping
+
+    def clear(self):
+        self.table.setRowCount(0)
+        self.rows.clear()
@@ -0,0 +1,124 @@
+import os
+import collections
+import numpy as np
+from AnalysisCache import cache_path
+
+DEFAULT_MEMORY_BUDGET = 2 * 1024 ** 3  # Bytes of decoded audio kept resident
+
+
+class AudioEntry:
+    """Metadata for one loaded recording plus its samples, resident or memory-mapped."""
+
+    __slots__ = ('key', 'path', 'sr', 'channels', 'frames', 'duration', 'data', 'spill_path')
+
+    def __init__(self, key, path, data, sr):
+        self.key = key
+        self.path = path
+        self.sr = int(sr)
+        self.channels = 1 if data.ndim == 1 else data.shape[0]
+        self.frames = data.shape[-1]
+        self.duration = self.frames / self.sr
+        self.data = data
+        self.spill_path = None
+
+    @property
+    def resident(self):
+        return not isinstance(self.data, np.memmap)
+
+
+class AudioStore:
+    """Decoded audio indexed by key with a RAM budget.
+
+    When the resident buffers exceed the budget, the least recently played ones
+    are written once to the cache directory and replaced by read-only memory maps,
+    so the OS pages them in on demand instead of the session holding everything.
+    A spill file belongs to its entry and is deleted when the key is replaced or cleared.
+    """
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET, on_evict=None):
+        self.memory_budget = memory_budget
+        self.on_evict = on_evict  # Called as on_evict(key, mapped_data) so holders can swap references
+        self.entries = {}
+        self.recent = collections.OrderedDict()  # Resident keys, least recently played first
+        self.resident_bytes = 0
+        self.spill_count = 0
+        self.stale_spills = []  # Spill files to delete, kept while Windows refuses because they are still mapped
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def keys(self):
+        return self.entries.keys()
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def add(self, key, path, data, sr):
+        self.remove(key)
+        entry = AudioEntry(key, path, data, sr)
+        self.entries[key] = entry
+        self.recent[key] = None
+        self.resident_bytes += data.nbytes
+        self.enforce_budget()
+        return entry
+
+    def samples(self, key):
+        self.touch(key)
+        return self.entries[key].data
+
+    def touch(self, key):
+        if key in self.recent:
+            self.recent.move_to_end(key)
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        if key in self.recent:
+            del self.recent[key]
+            self.resident_bytes -= entry.data.nbytes
+        if entry.spill_path is not None:
+            self.stale_spills.append(entry.spill_path)
+        self.delete_spills()
+
+    def clear(self):
+        self.stale_spills.extend(entry.spill_path for entry in self.entries.values() if entry.spill_path is not None)
+        self.entries.clear()
+        self.recent.clear()
+        self.resident_bytes = 0
+        self.delete_spills()
+
+    def delete_spills(self):
+        remaining = []
+        for spill_path in self.stale_spills:
+            try:
+                os.remove(spill_path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                remaining.append(spill_path)  # Still mapped by a holder, retried on the next removal
+        self.stale_spills = remaining
+
+    def enforce_budget(self):
+        # The most recently played buffer always stays resident
+        while self.resident_bytes > self.memory_budget and len(self.recent) > 1:
+            key = next(iter(self.recent))
+            self.evict(key)
+
+    def evict(self, key):
+        entry = self.entries[key]
+        if not entry.resident:
+            return
+        if entry.spill_path is None:
+            # Named per process and entry, so another session or a replaced key never shares the file
+            entry.spill_path = cache_path('spill', f"{os.getpid()}_{self.spill_count}.npy")
+            self.spill_count += 1
+            np.save(entry.spill_path, entry.data)
+        self.resident_bytes -= entry.data.nbytes
+        del self.recent[key]
+        entry.data = np.load(entry.spill_path, mmap_mode='r')
+        if self.on_evict is not None:
+            self.on_evict(key, entry.data)
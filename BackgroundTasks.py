@@ -0,0 +1,43 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# Shared pools so every analysis stage competes for the same cores instead of oversubscribing
+_process_pool = None
+_thread_pool = None
+
+
+def process_pool():
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) - 1))
+    return _process_pool
+
+
+def thread_pool():
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 2) * 4))
+    return _thread_pool
+
+
+class TaskRelay(QObject):
+    """Delivers the results of pool futures to the GUI thread as Qt signals."""
+
+    finished = pyqtSignal(object, object)  # tag, result
+    failed = pyqtSignal(object, str)  # tag, error message
+
+    def submit(self, tag, pool, fn, *args):
+        future = pool.submit(fn, *args)
+        future.add_done_callback(lambda done: self.deliver(tag, done))
+        return future
+
+    def deliver(self, tag, future):
+        # Runs on a pool thread, the signal is queued onto the receiver's thread
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self.failed.emit(tag, str(error))
+        else:
+            self.finished.emit(tag, future.result())
@@ -0,0 +1,145 @@
+import os
+import threading
+from CatalogDB import catalog_db
+
+HYPERX_COMPANY = "HyperX"
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def file_names(root, suffix):
+    # Names of the files in root ending in suffix, without it
+    try:
+        with os.scandir(root) as entries:
+            return [entry.name[:-len(suffix)] for entry in entries
+                    if entry.name.lower().endswith(suffix.lower()) and entry.is_file()]
+    except OSError as e:
+        print(f"Error reading directory: {e}")
+        return []
+
+
+class CatalogNode:
+    """One level of the catalog, children are looked up by name."""
+
+    __slots__ = ('children', 'sorted_names', 'record')
+
+    def __init__(self):
+        self.children = {}
+        self.sorted_names = None
+        self.record = None  # Field tuple of the entry that ends at this node, if one does
+
+    def add(self, name):
+        child = self.children.get(name)
+        if child is None:
+            child = self.children[name] = CatalogNode()
+            self.sorted_names = None
+        return child
+
+    def names(self):
+        # Sorted once and reused until a child is added
+        if self.sorted_names is None:
+            self.sorted_names = sorted(self.children)
+        return self.sorted_names
+
+
+class Catalog:
+    """Entries of a library folder parsed into a nested index by their underscore separated fields.
+
+    A name like Company_Model_Pattern_Position_Recording is split once and
+    stored as a path of nodes, so the children of any prefix are a dictionary
+    lookup away and listing them costs only what is listed.
+    """
+
+    def __init__(self, root, suffix='', names=None):
+        self.root = root
+        self.suffix = suffix  # '' catalogs folders, an extension such as '.wav' catalogs those files
+        self.tree = CatalogNode()
+        self.sorted_records = None
+        if names is None:
+            names = self.read_names()
+        for name in names:
+            self.add(name)
+
+    def read_names(self):
+        if not self.suffix:
+            return catalog_db().folder_names(self.root)  # Only relisted when the folder's mtime changed
+        return file_names(self.root, self.suffix)
+
+    def add(self, name):
+        fields = tuple(name.split('_'))
+        node = self.tree
+        for field in fields:
+            node = node.add(field)
+        node.record = fields
+        self.sorted_records = None
+
+    def remove(self, name):
+        fields = tuple(name.split('_'))
+        nodes = [self.tree]
+        for field in fields:
+            node = nodes[-1].children.get(field)
+            if node is None:
+                return
+            nodes.append(node)
+        nodes[-1].record = None
+        self.sorted_records = None
+        # Drop the nodes that no longer lead to any entry
+        for parent, field in zip(reversed(nodes[:-1]), reversed(fields)):
+            node = parent.children[field]
+            if node.record is not None or node.children:
+                break
+            del parent.children[field]
+            parent.sorted_names = None
+
+    def names(self):
+        return {"_".join(fields) for fields in self.records()}
+
+    def node(self, *fields):
+        node = self.tree
+        for field in fields:
+            node = node.children.get(field)
+            if node is None:
+                return None
+        return node
+
+    def children(self, *fields):
+        """Sorted names one level below the given leading fields."""
+        node = self.node(*fields)
+        return node.names() if node is not None else []
+
+    def records(self):
+        """Every entry as a tuple of its fields, in sorted order."""
+        if self.sorted_records is None:
+            records = []
+            stack = [self.tree]
+            while stack:
+                node = stack.pop()
+                if node.record is not None:
+                    records.append(node.record)
+                stack.extend(node.children.values())
+            records.sort()
+            self.sorted_records = records
+        return self.sorted_records
+
+    def hyperx_records(self):
+        return [fields for fields in self.records() if fields[0] == HYPERX_COMPANY]
+
+    def competitor_records(self):
+        return [fields for fields in self.records() if fields[0] != HYPERX_COMPANY]
+
+    def competitors(self):
+        return [company for company in self.children() if company != HYPERX_COMPANY]
+
+    def path(self, *fields):
+        return os.path.join(self.root, "_".join(fields) + self.suffix)
+
+
+def shared_catalog(root, suffix=''):
+    # Built on first use and then shared by every window that browses the same folder
+    key = (os.path.abspath(root), suffix)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = Catalog(root, suffix)
+        return catalog
@@ -0,0 +1,190 @@
+import os
+import json
+import sqlite3
+import argparse
+import threading
+from AnalysisCache import cache_path
+
+TRACKED_FILES = ["FRQ.csv", "MALE.wav", "FEMALE.wav", "PINKNOISE.wav"]  # What the comparison windows look for in a folder
+UNSCANNED = -1  # Folder mtime of a row whose files have not been read yet
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS folders (
+    path TEXT PRIMARY KEY,
+    root TEXT NOT NULL,
+    name TEXT NOT NULL,
+    fields TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS folders_by_root ON folders (root);
+CREATE TABLE IF NOT EXISTS files (
+    folder TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (folder, name)
+);
+"""
+
+_database = None
+_database_lock = threading.Lock()
+
+
+def stat_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def scan_folder(path):
+    """Size and mtime of each tracked file present in one comparison folder."""
+    files = {}
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name in TRACKED_FILES and entry.is_file():
+                stat = entry.stat()
+                files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+class CatalogDB:
+    """On-disk catalog of the comparison folders under each library root.
+
+    A directory's mtime changes whenever an entry is added, removed or renamed
+    in it, so a root is only relisted when its own mtime moved, and a folder's
+    files are only reread when the folder's mtime moved. A warm start costs one
+    stat for the folder names and one stat per folder for the file details.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or cache_path('catalog.sqlite')
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.executescript(SCHEMA)
+
+    def folder_names(self, root):
+        """Names of the folders directly under root, relisting it only if it changed."""
+        root = os.path.abspath(root)
+        if self.refresh_root(root) is None:
+            return []
+        with self.lock:
+            rows = self.connection.execute("SELECT name FROM folders WHERE root = ?", (root,)).fetchall()
+        return [name for (name,) in rows]
+
+    def refresh_root(self, root):
+        """Relist root if its mtime changed, returning the (added, removed) folder names or None if unreadable."""
+        mtime = stat_mtime(root)
+        if mtime is None:
+            print(f"Error reading directory: {root} is not accessible")
+            return None
+        if self.listed_names(root, mtime) is not None:
+            return [], []
+        try:
+            with os.scandir(root) as entries:
+                listed = {entry.name for entry in entries if entry.is_dir()}
+        except OSError as e:
+            print(f"Error reading directory: {e}")
+            return None
+        return self.store_listing(root, mtime, listed)
+
+    def listed_names(self, root, mtime):
+        """Folder names stored for root if it was last listed at this mtime, otherwise None."""
+        root = os.path.abspath(root)
+        with self.lock:
+            row = self.connection.execute("SELECT mtime_ns FROM roots WHERE path = ?", (root,)).fetchone()
+            if row is None or row[0] != mtime:
+                return None
+            return [name for (name,) in self.connection.execute("SELECT name FROM folders WHERE root = ?", (root,))]
+
+    def store_listing(self, root, mtime, listed):
+        """Record the folder names of root as listed at mtime, returning the (added, removed) names."""
+        root = os.path.abspath(root)
+        listed = set(listed)
+        with self.lock, self.connection:
+            known = {name for (name,) in self.connection.execute("SELECT name FROM folders WHERE root = ?", (root,))}
+            added = sorted(listed - known)
+            removed = sorted(known - listed)
+            for name in removed:
+                path = os.path.join(root, name)
+                self.connection.execute("DELETE FROM folders WHERE path = ?", (path,))
+                self.connection.execute("DELETE FROM files WHERE folder = ?", (path,))
+            # New folders are listed straight away, their files are read on first access or by the next refresh
+            self.connection.executemany(
+                "INSERT INTO folders (path, root, name, fields, mtime_ns) VALUES (?, ?, ?, ?, ?)",
+                [(os.path.join(root, name), root, name, json.dumps(name.split('_')), UNSCANNED)
+                 for name in added])
+            self.connection.execute("INSERT OR REPLACE INTO roots (path, mtime_ns) VALUES (?, ?)", (root, mtime))
+        return added, removed
+
+    def refresh(self, root):
+        """Bring root up to date and return the names of the folders whose files were reread."""
+        root = os.path.abspath(root)
+        if self.refresh_root(root) is None:
+            return []
+        with self.lock:
+            rows = self.connection.execute("SELECT path, name, mtime_ns FROM folders WHERE root = ?", (root,)).fetchall()
+        return self.rescan(rows)
+
+    def rescan(self, rows):
+        """Reread the files of the (path, name, known mtime) folders whose mtime moved, returning their names."""
+        updates = []
+        for path, name, known in rows:
+            mtime = stat_mtime(path)
+            if mtime is None or mtime == known:
+                continue  # Unchanged, or gone and dropped at the next relisting of root
+            try:
+                updates.append((path, name, mtime, scan_folder(path)))
+            except OSError as e:
+                print(f"Error reading directory: {e}")
+
+        with self.lock, self.connection:
+            for path, name, mtime, files in updates:
+                self.connection.execute("UPDATE folders SET mtime_ns = ? WHERE path = ?", (mtime, path))
+                self.connection.execute("DELETE FROM files WHERE folder = ?", (path,))
+                self.connection.executemany("INSERT INTO files (folder, name, size, mtime_ns) VALUES (?, ?, ?, ?)",
+                                            [(path, file_name, size, file_mtime)
+                                             for file_name, (size, file_mtime) in files.items()])
+        return [name for _, name, _, _ in updates]
+
+    def files(self, root):
+        """Folder name -> {file name: [size, mtime_ns]} for every folder under root, reading new folders first."""
+        root = os.path.abspath(root)
+        with self.lock:
+            unscanned = self.connection.execute("SELECT path, name, mtime_ns FROM folders WHERE root = ? AND mtime_ns = ?",
+                                                (root, UNSCANNED)).fetchall()
+        if unscanned:
+            self.rescan(unscanned)  # Listed by folder_names but not read yet, whichever window listed them
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT folders.name, files.name, files.size, files.mtime_ns FROM folders "
+                "JOIN files ON files.folder = folders.path WHERE folders.root = ?", (root,)).fetchall()
+        result = {}
+        for folder_name, file_name, size, mtime in rows:
+            result.setdefault(folder_name, {})[file_name] = [size, mtime]
+        return result
+
+
+def catalog_db():
+    # One connection per process, shared by every selection window
+    global _database
+    with _database_lock:
+        if _database is None:
+            _database = CatalogDB()
+        return _database
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update the folder catalog of one or more library roots")
+    parser.add_argument('roots', nargs='+')
+    args = parser.parse_args()
+    for root in args.roots:
+        changed = catalog_db().refresh(root)
+        folders = catalog_db().files(root)
+        complete = sum(1 for files in folders.values() if all(name in files for name in TRACKED_FILES))
+        print(f"{root}: {len(catalog_db().folder_names(root))} folders, {complete} complete, {len(changed)} rescanned")
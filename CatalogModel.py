@@ -0,0 +1,431 @@
+import bisect
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QBrush, QColor
+
+FETCH_BATCH = 256  # Rows added per fetchMore, so very wide branches fill in as they are scrolled
+LOADING_TEXT = "Loading..."
+
+
+class ModelNode:
+    __slots__ = ('name', 'parent', 'depth', 'names', 'children', 'by_name', 'records', 'loader',
+                 'record', 'check', 'fetched', 'status', 'loading', 'placeholder', 'counts')
+
+    def __init__(self, name, parent, check):
+        self.name = name
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self.names = None  # Sorted child names, None until the node's records are grouped
+        self.children = []
+        self.by_name = {}
+        self.records = []  # (path, record) pairs below this node that are not grouped yet
+        self.loader = None  # Callable returning the records of this node, run on first use
+        self.record = None  # Record whose path ends at this node
+        self.check = check
+        self.fetched = 0  # Children the view has been told about
+        self.status = None
+        self.loading = False  # Records are still arriving from a background scan
+        self.placeholder = None  # Row shown after the children while loading, check is None
+        self.counts = [0, 0, 0]  # Children unchecked, partly checked and checked, indexed by check state
+
+    def is_empty(self):
+        if self.record is not None or self.loader is not None or self.loading:
+            return False
+        return not self.records if self.names is None else not self.children
+
+
+class CatalogModel(QAbstractItemModel):
+    """Lazy tree over catalog records for a QTreeView.
+
+    Each record is placed at the path `path_of(record)` returns. A node's
+    records are only grouped into children when the view first expands it,
+    and rows are handed to the view in batches, so opening a library of any
+    size costs only what is on screen. Children are found by name in a dict
+    and located by bisecting the sorted names, never by walking siblings.
+
+    Check boxes are tri-state. Every node counts the check states of its
+    children, so a click sets the branch below it in one pass and fixes its
+    ancestors from their counts, and a single selection delta is announced.
+    """
+
+    selectionChanged = pyqtSignal(list, list)  # records that became checked, records that stopped being checked
+
+    def __init__(self, records=(), path_of=tuple, font=None, status_of=None, keep_depth=0, parent=None):
+        super().__init__(parent)
+        self.path_of = path_of
+        self.font = font
+        self.status_of = status_of  # record -> (colour, tooltip), or None while unknown
+        self.keep_depth = keep_depth  # Nodes up to this depth stay when emptied, like section titles
+        self.root = ModelNode(None, None, Qt.Unchecked)
+        for record in records:
+            self.queue(self.root, self.path_of(record), record)
+
+    def queue(self, node, path, record):
+        if len(path) == node.depth:
+            node.record = record
+        else:
+            node.records.append((path, record))
+
+    def branch(self, prefix):
+        """The node at `prefix`, created if no record leads there yet, such as a section title."""
+        node = self.root
+        for name in prefix:
+            self.group(node)
+            node = node.by_name.get(name) or self.insert_child(
+                node, name, Qt.Checked if node.check == Qt.Checked else Qt.Unchecked, notify=True)
+        return node
+
+    def add_loader(self, prefix, loader):
+        """Attach records that are only read when the node at `prefix` is first expanded or checked."""
+        self.branch(prefix).loader = loader
+
+    def set_loading(self, prefix, loading):
+        """Mark the node at `prefix` as receiving its records through add_records, showing a placeholder meanwhile."""
+        node = self.branch(prefix)
+        node.loader = None  # The records are delivered instead of read
+        node.loading = loading
+        if loading:
+            self.show_placeholder(node)
+        elif node.placeholder is not None:
+            self.beginRemoveRows(self.index_of(node), node.fetched, node.fetched)
+            node.placeholder = None
+            self.endRemoveRows()
+
+    def show_placeholder(self, node):
+        # Only once the node is grouped, before that the view just sees that it can be expanded
+        if node.loading and node.placeholder is None and node.names is not None:
+            self.beginInsertRows(self.index_of(node), node.fetched, node.fetched)
+            node.placeholder = ModelNode(LOADING_TEXT, node, None)
+            self.endInsertRows()
+
+    def load(self, node):
+        if node.loader is not None:
+            loader, node.loader = node.loader, None
+            for record in loader():
+                self.queue(node, self.path_of(record), record)
+
+    def group(self, node):
+        # Splits the records waiting at a node into its children, the first time they are needed
+        if node.names is not None:
+            return
+        self.load(node)
+        node.names = []
+        records, node.records = node.records, None
+        for path, record in records:
+            name = path[node.depth]
+            child = node.by_name.get(name)
+            if child is None:
+                child = self.insert_child(node, name, node.check, notify=False)  # Inherits a pending check
+            self.queue(child, path, record)
+
+    def insert_child(self, node, name, check, notify):
+        position = bisect.bisect_left(node.names, name)
+        child = ModelNode(name, node, check)
+        visible = notify and (position < node.fetched or node.fetched == len(node.children))
+        if visible:
+            self.beginInsertRows(self.index_of(node), position, position)
+        node.names.insert(position, name)
+        node.children.insert(position, child)
+        node.by_name[name] = child
+        node.counts[check] += 1
+        if visible:
+            node.fetched += 1
+            self.endInsertRows()
+        return child
+
+    def remove_child(self, node, child):
+        position = bisect.bisect_left(node.names, child.name)
+        visible = position < node.fetched
+        if visible:
+            self.beginRemoveRows(self.index_of(node), position, position)
+        del node.names[position]
+        del node.children[position]
+        del node.by_name[child.name]
+        node.counts[child.check] -= 1
+        if visible:
+            node.fetched -= 1
+            self.endRemoveRows()
+
+    def row_of(self, node):
+        if node is node.parent.placeholder:
+            return node.parent.fetched
+        return bisect.bisect_left(node.parent.names, node.name)
+
+    def index_of(self, node):
+        if node is self.root:
+            return QModelIndex()
+        return self.createIndex(self.row_of(node), 0, node)
+
+    def node_of(self, index):
+        return index.internalPointer() if index.isValid() else self.root
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self.node_of(parent)
+        if column != 0 or node.names is None or not 0 <= row < self.rowCount(parent):
+            return QModelIndex()
+        return self.createIndex(row, 0, node.children[row] if row < node.fetched else node.placeholder)
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.index_of(index.internalPointer().parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        node = self.node_of(parent)
+        return node.fetched + (node.placeholder is not None)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.node_of(parent)
+        if node.names is None:
+            return node.loader is not None or node.loading or bool(node.records)
+        return bool(node.children) or node.placeholder is not None
+
+    def canFetchMore(self, parent):
+        node = self.node_of(parent)
+        if node.names is None:
+            return node.loader is not None or node.loading or bool(node.records)
+        return node.fetched < len(node.children)
+
+    def fetchMore(self, parent):
+        node = self.node_of(parent)
+        self.group(node)
+        count = min(FETCH_BATCH, len(node.children) - node.fetched)
+        if count > 0:
+            self.beginInsertRows(parent, node.fetched, node.fetched + count - 1)
+            node.fetched += count
+            self.endInsertRows()
+        self.show_placeholder(node)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.internalPointer().check is None:
+            return Qt.ItemIsEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsUserCheckable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.DisplayRole:
+            return node.name
+        if role == Qt.CheckStateRole:
+            return node.check
+        if role == Qt.FontRole:
+            return self.font
+        if role == Qt.UserRole:
+            return node.record
+        if role in (Qt.ForegroundRole, Qt.ToolTipRole):
+            status = self.status(node)
+            if role == Qt.ToolTipRole:
+                return status[1] if status else None
+            return QBrush(QColor(status[0] if status else "black" if node.check is not None else "#9a9a9a"))
+        return None
+
+    def status(self, node):
+        # Worked out for the rows that are actually shown, and remembered
+        if node.record is None or self.status_of is None:
+            return None
+        if node.status is None:
+            node.status = self.status_of(node.record)
+        return node.status
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or not index.isValid() or index.internalPointer().check is None:
+            return False
+        self.set_check(index.internalPointer(), Qt.Checked if value == Qt.Checked else Qt.Unchecked)
+        return True
+
+    def set_check(self, node, state):
+        # Checking a node checks everything below it; nodes not grouped yet pass it on when they are
+        added, removed = [], []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current.check == state:
+                continue  # A checked or unchecked branch is already that way all the way down
+            self.follow_check(current, state, added, removed)
+            self.change_check(current, state)
+            if current.names is not None:
+                stack.extend(current.children)
+                self.rows_changed(current, [Qt.CheckStateRole])
+        index = self.index_of(node)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        self.update_ancestors(node.parent, added, removed)
+        self.announce(added, removed)
+
+    def change_check(self, node, state):
+        # Sets a node's own state and keeps the counts of its parent in step
+        if node.parent is not None:
+            node.parent.counts[node.check] -= 1
+            node.parent.counts[state] += 1
+        node.check = state
+
+    def follow_check(self, node, state, added, removed):
+        # Records ending at a node, or still waiting in it, are selected exactly while it is checked
+        if (node.check == Qt.Checked) == (state == Qt.Checked):
+            return
+        records = [node.record] if node.record is not None else []
+        if node.names is None:
+            self.load(node)
+            records.extend(record for _, record in node.records)
+        (added if state == Qt.Checked else removed).extend(records)
+
+    def derived_check(self, node):
+        unchecked, partial, checked = node.counts
+        if partial or (checked and unchecked):
+            return Qt.PartiallyChecked
+        if checked:
+            return Qt.Checked
+        if unchecked:
+            return Qt.Unchecked
+        return Qt.Unchecked if node.check == Qt.PartiallyChecked else node.check  # No children left to follow
+
+    def update_ancestors(self, node, added, removed):
+        # Walks up only while the counts actually change a node's state
+        while node is not None and node is not self.root:
+            state = self.derived_check(node)
+            if state == node.check:
+                break
+            self.follow_check(node, state, added, removed)
+            self.change_check(node, state)
+            index = self.index_of(node)
+            self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+            node = node.parent
+
+    def announce(self, added, removed):
+        if added or removed:
+            self.selectionChanged.emit(added, removed)
+
+    def rows_changed(self, node, roles):
+        # Redraws the children of a node the view has been shown
+        if node.fetched:
+            parent_index = self.index_of(node)
+            self.dataChanged.emit(self.index(0, 0, parent_index), self.index(node.fetched - 1, 0, parent_index), roles)
+
+    def set_checked_records(self, selected):
+        """Check the nodes whose records are all in `selected` and uncheck the rest.
+
+        Branches that are wholly in or out of the selection keep a single
+        pending check, only partly selected ones are grouped to tell them apart.
+        Nothing is announced, the selection is already known to the caller.
+        """
+        self.sync_check(self.root, selected)
+
+    def sync_check(self, node, selected):
+        self.load(node)
+        if node.names is None:
+            records = [record for _, record in node.records]
+            if node.record is not None:
+                records.append(node.record)
+            count = sum(1 for record in records if record in selected)
+            if count == 0 or count == len(records):
+                self.change_check(node, Qt.Checked if count else Qt.Unchecked)
+                return
+            self.group(node)
+        for child in node.children:
+            self.sync_check(child, selected)
+        if node.children:
+            self.change_check(node, self.derived_check(node))
+        else:
+            self.change_check(node, Qt.Checked if node.record in selected else Qt.Unchecked)
+        self.rows_changed(node, [Qt.CheckStateRole])
+
+    def checked_records(self):
+        """Records whose node is checked, in tree order."""
+        result = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.record is not None and node.check == Qt.Checked:
+                result.append(node.record)
+            if node.names is None:
+                if node.check == Qt.Checked:
+                    self.load(node)  # A checked branch includes records that were never shown
+                    result.extend(record for _, record in sorted(node.records, key=lambda pair: pair[0]))
+                continue
+            stack.extend(reversed(node.children))
+        return result
+
+    def add_records(self, records, inherit_check=False):
+        """Place new records, under new unchecked branches or, with inherit_check, ones checked like their parent."""
+        added, removed = [], []
+        for record in records:
+            path = self.path_of(record)
+            node = self.root
+            grown = None  # Highest node that gained a child, its state may change
+            while True:
+                if node.names is None:
+                    if node.loader is not None:
+                        break  # A pending loader reads the current catalog anyway
+                    if inherit_check or node.check != Qt.Checked or len(path) == node.depth:
+                        self.queue(node, path, record)
+                        break
+                    self.group(node)  # Waiting in a checked branch would check the new record too
+                if len(path) == node.depth:
+                    node.record = record
+                    index = self.index_of(node)
+                    self.dataChanged.emit(index, index)
+                    break
+                name = path[node.depth]
+                child = node.by_name.get(name)
+                if child is None:
+                    check = Qt.Checked if inherit_check and node.check == Qt.Checked else Qt.Unchecked
+                    child = self.insert_child(node, name, check, notify=True)
+                    grown = grown or node
+                node = child
+            if node.loader is not None:
+                continue
+            if node.check == Qt.Checked:
+                added.append(record)
+            self.update_ancestors(grown, added, removed)
+        self.announce(added, removed)
+
+    def remove_records(self, records):
+        """Drop records and the branches they leave empty."""
+        added, removed = [], []
+        for record in records:
+            path = self.path_of(record)
+            chain = [self.root]
+            while chain[-1].names is not None and len(path) > chain[-1].depth:
+                child = chain[-1].by_name.get(path[chain[-1].depth])
+                if child is None:
+                    break
+                chain.append(child)
+            node = chain[-1]
+            if len(path) == node.depth and node.record == record:
+                node.record = None
+                node.status = None
+            elif node.names is None and (path, record) in node.records:
+                node.records.remove((path, record))
+            else:
+                continue
+            if node.check == Qt.Checked:
+                removed.append(record)
+            for child in reversed(chain[1:]):
+                if not child.is_empty() or child.depth <= self.keep_depth:
+                    break
+                self.remove_child(child.parent, child)
+                node = child.parent
+            self.update_ancestors(node, added, removed)
+        self.announce(added, removed)
+
+    def refresh_status(self, records=None):
+        """Forget the audio status of every shown record, or of the given ones, and redraw them."""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.names is None:
+                continue
+            changed = False
+            for child in node.children:
+                if child.record is not None and (records is None or child.record in records):
+                    child.status = None
+                    changed = True
+                stack.append(child)
+            if changed:
+                self.rows_changed(node, [Qt.ForegroundRole, Qt.ToolTipRole])
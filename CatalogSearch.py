@@ -0,0 +1,95 @@
+import bisect
+from collections import Counter
+
+FUZZY_OVERLAP = 0.6  # Share of a misspelt word's trigrams a field must contain to still match it
+
+
+def record_words(record):
+    """Lower-case words a record can be found by: each field, and the parts of fields like Product-Build-Sample."""
+    words = set()
+    for field in record:
+        field = field.lower()
+        words.add(field)
+        if '-' in field:
+            words.update(part for part in field.split('-') if part)
+    return words
+
+
+def trigrams(word):
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+class SearchIndex:
+    """Prefix and trigram index over the fields of catalog records.
+
+    Every field is a word in a sorted vocabulary. A query word matches the
+    words it starts, found by bisection, and the words that contain it, found
+    by intersecting trigram postings. A record is a result when each query
+    word matches one of its words. A word that matches nothing falls back to
+    the words sharing most of its trigrams, so small typos still find it.
+    """
+
+    def __init__(self, records=()):
+        self.records = []  # id -> record, None once removed
+        self.ids = {}
+        self.words = []  # Sorted vocabulary
+        self.postings = {}  # word -> ids of the records that have it
+        self.trigram_words = {}  # trigram -> words containing it
+        for record in records:
+            self.add(record)
+
+    def add(self, record):
+        if record in self.ids:
+            return
+        record_id = self.ids[record] = len(self.records)  # Ids follow catalog order, results are sorted by them
+        self.records.append(record)
+        for word in record_words(record):
+            ids = self.postings.get(word)
+            if ids is None:
+                ids = self.postings[word] = set()
+                bisect.insort(self.words, word)
+                for trigram in trigrams(word):
+                    self.trigram_words.setdefault(trigram, set()).add(word)
+            ids.add(record_id)
+
+    def remove(self, record):
+        record_id = self.ids.pop(record, None)
+        if record_id is None:
+            return
+        self.records[record_id] = None
+        for word in record_words(record):
+            ids = self.postings[word]
+            ids.discard(record_id)
+            if not ids:
+                del self.postings[word]
+                del self.words[bisect.bisect_left(self.words, word)]
+                for trigram in trigrams(word):
+                    self.trigram_words[trigram].discard(word)
+
+    def matching_words(self, word):
+        start = bisect.bisect_left(self.words, word)
+        end = bisect.bisect_left(self.words, word + '\uffff', start)
+        matched = self.words[start:end]
+        query_trigrams = trigrams(word)
+        if not query_trigrams:
+            return matched
+        postings = sorted((self.trigram_words.get(trigram, set()) for trigram in query_trigrams), key=len)
+        matched += [candidate for candidate in set.intersection(*postings)
+                    if word in candidate and not candidate.startswith(word)]
+        if not matched:
+            hits = Counter(candidate for trigram in query_trigrams for candidate in self.trigram_words.get(trigram, ()))
+            matched = [candidate for candidate, count in hits.items() if count >= FUZZY_OVERLAP * len(query_trigrams)]
+        return matched
+
+    def search(self, query):
+        """Records matching every word of the query, in catalog order."""
+        words = query.lower().replace('_', ' ').split()
+        result = None
+        for word in sorted(set(words), key=len, reverse=True):  # Long words narrow the result fastest
+            ids = set()
+            for matched in self.matching_words(word):
+                ids |= self.postings[matched]
+            result = ids if result is None else result & ids
+            if not result:
+                return []
+        return [self.records[record_id] for record_id in sorted(result)] if result else []
@@ -0,0 +1,130 @@
+import os
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+from BackgroundTasks import TaskRelay, thread_pool
+from Catalog import file_names
+from CatalogDB import catalog_db, stat_mtime
+
+DEBOUNCE_MS = 500  # Quiet time after the last change before a root is rescanned
+POLL_INTERVAL_MS = 10000  # How often roots that cannot be watched are checked
+
+_watcher = None
+
+
+def catalog_delta(root, suffix, known):
+    """(added, removed, changed) names of a catalog root compared to the names it already holds."""
+    if suffix:
+        current = set(file_names(root, suffix))
+        changed = []
+    else:
+        changed = catalog_db().refresh(root)  # Relists root and rereads only the folders that changed
+        current = set(catalog_db().folder_names(root))
+    added = sorted(current - known)
+    return added, sorted(known - current), sorted(set(changed) - set(added))
+
+
+class CatalogWatcher(QObject):
+    """Keeps shared catalogs in step with their folders while the app runs.
+
+    Directory change notifications, or a poll of the root's mtime where the
+    file system does not deliver them, mark a root dirty. Once changes stop
+    for a moment the root is rescanned on the thread pool, the catalog is
+    patched on the GUI thread, and one delta per root is announced, however
+    many folders arrived in the burst.
+    """
+
+    catalogChanged = pyqtSignal(object, list, list, list)  # catalog, added names, removed names, changed names
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.catalogs = {}  # root path -> catalog
+        self.folder_roots = {}  # watched comparison folder -> its root, so new files in them are noticed
+        self.dirty = set()
+        self.running = set()
+        self.polled = {}  # root path -> last seen mtime, for roots the system watcher refused
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.directory_changed)
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(DEBOUNCE_MS)
+        self.debounce_timer.timeout.connect(self.rescan)
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(POLL_INTERVAL_MS)
+        self.poll_timer.timeout.connect(self.poll)
+
+        self.relay = TaskRelay(self)
+        self.relay.finished.connect(self.apply_delta)
+        self.relay.failed.connect(self.delta_failed)
+
+    def watch(self, catalog):
+        root = os.path.abspath(catalog.root)
+        if root in self.catalogs:
+            return
+        self.catalogs[root] = catalog
+        if not os.path.isdir(root) or not self.watcher.addPath(root):
+            self.polled[root] = stat_mtime(root)
+            self.poll_timer.start()
+
+    def directory_changed(self, directory):
+        directory = os.path.abspath(directory)
+        root = directory if directory in self.catalogs else self.folder_roots.get(directory)
+        if root is not None:
+            self.mark_dirty(root)
+
+    def poll(self):
+        for root, mtime in self.polled.items():
+            current = stat_mtime(root)
+            if current != mtime:
+                self.polled[root] = current
+                self.mark_dirty(root)
+
+    def mark_dirty(self, root):
+        self.dirty.add(root)
+        self.debounce_timer.start()  # Restarted by every change, so a burst is rescanned once
+
+    def rescan(self):
+        for root in list(self.dirty):
+            if root in self.running:
+                continue  # Picked up again when the scan in flight finishes
+            self.dirty.discard(root)
+            self.running.add(root)
+            catalog = self.catalogs[root]
+            self.relay.submit(root, thread_pool(), catalog_delta, root, catalog.suffix, catalog.names())
+
+    def apply_delta(self, root, delta):
+        self.running.discard(root)
+        added, removed, changed = delta
+        catalog = self.catalogs[root]
+        for name in removed:
+            catalog.remove(name)
+        for name in added:
+            catalog.add(name)
+        if not catalog.suffix:
+            # Deleted or renamed folders would otherwise stay in the system watcher for the rest of the session
+            gone = [folder for folder in (os.path.join(root, name) for name in removed)
+                    if self.folder_roots.pop(folder, None) is not None]
+            if gone:
+                self.watcher.removePaths(gone)
+            # New folders are usually still being filled, so watch them for their files too
+            folders = [os.path.join(root, name) for name in added]
+            if folders:
+                self.watcher.addPaths(folders)
+                self.folder_roots.update((folder, root) for folder in folders)
+        if added or removed or changed:
+            self.catalogChanged.emit(catalog, added, removed, changed)
+        if self.dirty:
+            self.debounce_timer.start()
+
+    def delta_failed(self, root, error):
+        self.running.discard(root)
+        print(f"Error rescanning {root}: {error}")
+
+
+def catalog_watcher():
+    # One watcher shared by every selection window, created once the application exists
+    global _watcher
+    if _watcher is None:
+        _watcher = CatalogWatcher()
+    return _watcher
@@ -0,0 +1,63 @@
+import os
+import re
+import struct
+import numpy as np
+from BackgroundTasks import thread_pool
+from WavIndex import wav_index
+
+
+def wav_header(info, frames):
+    """RIFF header for `frames` frames in the same sample format as the indexed source file."""
+    data_size = frames * info['block_align']
+    fmt = struct.pack('<HHIIHH', info['format'], info['channels'], info['sample_rate'],
+                      info['sample_rate'] * info['block_align'], info['block_align'], info['bits'])
+    riff_size = 4 + (8 + len(fmt)) + (8 + data_size + (data_size & 1))
+    return (b'RIFF' + struct.pack('<I', riff_size) + b'WAVE'
+            + b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+            + b'data' + struct.pack('<I', data_size))
+
+
+def mapped_frames(path):
+    """The data chunk of a WAV file as a read-only memory map, one row of raw bytes per frame."""
+    info = wav_index().info(path)
+    if not info['valid']:
+        raise ValueError(f"{os.path.basename(path)}: {info['error']}")
+    frames = np.memmap(path, dtype=np.uint8, mode='r', offset=info['data_offset'],
+                       shape=(info['frames'], info['block_align']))
+    return frames, info
+
+
+def write_clip(path, start_seconds, end_seconds, target):
+    """Write the frames of `path` between two times to `target` without decoding them.
+
+    The clip is a slice of the memory-mapped source, written straight to disk
+    in the source's own sample format.
+    """
+    frames, info = mapped_frames(path)
+    first = max(0, min(int(round(start_seconds * info['sample_rate'])), len(frames)))
+    last = max(first, min(int(round(end_seconds * info['sample_rate'])), len(frames)))
+    clip = frames[first:last]
+    with open(target, 'wb') as handle:
+        handle.write(wav_header(info, len(clip)))
+        handle.write(clip)
+        if clip.nbytes & 1:
+            handle.write(b'\0')  # Chunks are word aligned
+    return target
+
+
+def clip_name(display_name, start_seconds, end_seconds):
+    name = re.sub(r'[\\/:*?"<>|]', '_', display_name)
+    return f"{name} {start_seconds:.2f}-{end_seconds:.2f}s.wav"
+
+
+def export_clips(jobs):
+    """Write (path, start, end, target) clips in parallel, returning the written paths and the failures."""
+    futures = [(job, thread_pool().submit(write_clip, *job)) for job in jobs]
+    written = []
+    failed = []
+    for job, future in futures:
+        try:
+            written.append(future.result())
+        except (OSError, ValueError) as e:
+            failed.append(f"{os.path.basename(job[3])}: {e}")
+    return written, failed
@@ -0,0 +1,54 @@
+import os
+from PyQt5.QtCore import QObject, pyqtSignal
+from BackgroundTasks import thread_pool
+from CatalogDB import catalog_db, stat_mtime
+
+SCAN_BATCH = 256  # Folder names handed to the GUI thread at a time
+
+
+class FolderScanner(QObject):
+    """Lists folders on the thread pool and streams their names back in batches.
+
+    os.scandir tells directories apart from the listing itself on most file
+    systems, so no stat is made per entry, and the first rows can be shown
+    while a large folder on a network share is still being read. Listings go
+    into the folder catalog, so a folder whose mtime has not moved since is
+    served from it without being listed again.
+    """
+
+    batchReady = pyqtSignal(object, list)  # tag, folder names
+    scanFinished = pyqtSignal(object)  # tag
+    scanFailed = pyqtSignal(object, str)  # tag, error message
+
+    def scan(self, tag, root):
+        return thread_pool().submit(self.list_folders, tag, root)
+
+    def list_folders(self, tag, root):
+        # Runs on a pool thread, every signal is emitted from here so they reach the GUI thread in order
+        mtime = stat_mtime(root)
+        names = catalog_db().listed_names(root, mtime) if mtime is not None else None
+        if names is not None:
+            for start in range(0, len(names), SCAN_BATCH):
+                self.batchReady.emit(tag, names[start:start + SCAN_BATCH])
+            self.scanFinished.emit(tag)
+            return
+        names = []
+        batch = []
+        try:
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        batch.append(entry.name)
+                        if len(batch) >= SCAN_BATCH:
+                            self.batchReady.emit(tag, batch)
+                            names += batch
+                            batch = []
+        except OSError as e:
+            self.scanFailed.emit(tag, str(e))
+            return
+        if batch:
+            self.batchReady.emit(tag, batch)
+            names += batch
+        if mtime is not None:
+            catalog_db().store_listing(root, mtime, names)  # Taken before listing, a change meanwhile shows up next time
+        self.scanFinished.emit(tag)
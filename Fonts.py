@@ -0,0 +1,6 @@
+from matplotlib.font_manager import FontProperties
+
+# One typeface for the Qt widgets and the matplotlib plots of every window
+FONT_FAMILY = 'Forma DJR Micro'
+FONT_SIZE = 10
+MATPLOTLIB_FONT = FontProperties(family=FONT_FAMILY, size=FONT_SIZE)
@@ -0,0 +1,109 @@
+import numpy as np
+from Spectrogram import stft_power
+
+LOOP_NFFT = 4096
+LOOP_HOP = 2048
+FRAMES_PER_BLOCK = 512  # Per-frame spectra are computed and cached in blocks of this many frames
+DB_FLOOR = -120.0
+
+
+class FrameSpectra:
+    """Cached per-frame power spectra of one recording and a running sum over a frame range.
+
+    Moving the range only adds or subtracts the frames that entered or left it,
+    so dragging a loop edge costs time proportional to how far the edge moved.
+    Blocks the range reaches for the first time are not computed here: they are
+    collected by take_wanted for the thread pool and summed in by add_block, so
+    the sum covers the frames whose blocks have arrived so far.
+    """
+
+    def __init__(self, entry, nfft=LOOP_NFFT, hop=LOOP_HOP):
+        self.entry = entry
+        self.nfft = nfft
+        self.hop = hop
+        self.frame_total = max(0, (entry.frames - nfft) // hop + 1)
+        self.freqs = np.fft.rfftfreq(nfft, 1 / entry.sr)
+        self.blocks = {}  # block index -> (frames, bins) power
+        self.wanted = set()  # Blocks the range needs that nobody is computing yet
+        self.pending = set()  # Blocks handed out by take_wanted
+        self.start = 0
+        self.end = 0
+        self.total = np.zeros(len(self.freqs))
+        self.count = 0  # Frames of the range included in the total
+
+    def compute_block(self, index):
+        # Runs on a pool thread, reads a view of the samples
+        first = index * FRAMES_PER_BLOCK * self.hop
+        last = first + (FRAMES_PER_BLOCK - 1) * self.hop + self.nfft
+        return stft_power(self.entry.data[..., first:last], self.nfft, self.hop)
+
+    def take_wanted(self):
+        wanted = sorted(self.wanted)
+        self.pending.update(wanted)
+        self.wanted.clear()
+        return wanted
+
+    def add_block(self, index, power):
+        """Store a computed block and sum in its frames inside the range; True if there were any."""
+        self.pending.discard(index)
+        if index in self.blocks:
+            return False
+        self.blocks[index] = power
+        first = max(self.start, index * FRAMES_PER_BLOCK)
+        last = min(self.end, (index + 1) * FRAMES_PER_BLOCK)
+        if first >= last:
+            return False
+        offset = first - index * FRAMES_PER_BLOCK
+        self.total += power[offset:offset + last - first].sum(axis=0, dtype=np.float64)
+        self.count += last - first
+        return True
+
+    def block_failed(self, index):
+        self.pending.discard(index)  # Asked for again the next time the range reaches it
+
+    def frame_sum(self, first, last):
+        total = np.zeros(len(self.freqs))
+        count = 0
+        frame = first
+        while frame < last:
+            index, offset = divmod(frame, FRAMES_PER_BLOCK)
+            frames = min(last - frame, FRAMES_PER_BLOCK - offset)
+            power = self.blocks.get(index)
+            if power is not None:
+                total += power[offset:offset + frames].sum(axis=0, dtype=np.float64)
+                count += frames
+            elif index not in self.pending:
+                self.wanted.add(index)
+            frame += frames
+        return total, count
+
+    def set_range(self, first, last):
+        first = max(0, min(first, self.frame_total))
+        last = max(first, min(last, self.frame_total))
+        if last <= self.start or first >= self.end:
+            # No overlap with the previous range, start over
+            self.total, self.count = self.frame_sum(first, last)
+        else:
+            for edge_first, edge_last, sign in ((first, self.start, 1), (self.start, first, -1),
+                                                (self.end, last, 1), (last, self.end, -1)):
+                if edge_first < edge_last:
+                    total, count = self.frame_sum(edge_first, edge_last)
+                    self.total += sign * total
+                    self.count += sign * count
+        self.start, self.end = first, last
+
+    def spectrum(self):
+        """Average spectrum in dB of the range's frames computed so far, None before any have been."""
+        if self.count <= 0:
+            return None
+        band = self.freqs > 0
+        with np.errstate(divide='ignore'):
+            db = 10 * np.log10(np.maximum(self.total[band] / self.count, 0))
+        return self.freqs[band], np.maximum(db, DB_FLOOR)
+
+    def region_spectrum(self, start_seconds, end_seconds):
+        """Move the range to the frames that lie inside a time region and return spectrum()."""
+        first = int(np.ceil(start_seconds * self.entry.sr / self.hop))
+        last = int((end_seconds * self.entry.sr - self.nfft) // self.hop) + 1
+        self.set_range(first, max(first + 1, last))
+        return self.spectrum()
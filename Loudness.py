@@ -0,0 +1,180 @@
+import os
+import sys
+import argparse
+import numpy as np
+import scipy.signal
+import soundfile as sf
+from PyQt5.QtCore import QObject, pyqtSignal
+from AnalysisCache import JsonCache, file_hash
+from BackgroundTasks import TaskRelay, process_pool
+
+BLOCK_SECONDS = 0.4  # BS.1770 gating block
+STEP_SECONDS = 0.1  # 75% block overlap
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+TRUE_PEAK_OVERSAMPLE = 4
+CHUNK_SECONDS = 10  # Oversampling is done in chunks so long files never get a 4x copy
+SILENCE_DB = -120.0
+MAX_MATCH_DB = 24.0  # Gain matching never moves a source further than this
+
+
+def k_weighting(sr):
+    """Second-order sections of the BS.1770 K-weighting filter at any sample rate.
+
+    Bilinear-transform form that reproduces the 48 kHz coefficients published in
+    the recommendation and generalises them to other rates.
+    """
+    # Stage 1: high shelf modelling the acoustic effect of the head
+    f0, gain_db, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = np.tan(np.pi * f0 / sr)
+    vh = 10 ** (gain_db / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = [(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0,
+             1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+
+    # Stage 2: RLB high-pass
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = np.tan(np.pi * f0 / sr)
+    a0 = 1 + k / q + k * k
+    highpass = [1.0, -2.0, 1.0, 1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+
+    return np.array([shelf, highpass])
+
+
+def to_db(power_or_amplitude, power=True):
+    factor = 10 if power else 20
+    with np.errstate(divide='ignore'):
+        value = factor * np.log10(power_or_amplitude)
+    return float(max(value, SILENCE_DB))
+
+
+def integrated_loudness(y, sr):
+    """Gated integrated loudness in LUFS of a (channels, frames) signal."""
+    filtered = scipy.signal.sosfilt(k_weighting(sr), y, axis=-1)
+    block = int(round(BLOCK_SECONDS * sr))
+    step = int(round(STEP_SECONDS * sr))
+    if filtered.shape[-1] < block:
+        return SILENCE_DB
+
+    # Block mean squares for every channel from one cumulative sum
+    energy = np.concatenate([np.zeros((filtered.shape[0], 1)), np.cumsum(filtered ** 2, axis=-1)], axis=-1)
+    starts = np.arange(0, filtered.shape[-1] - block + 1, step)
+    block_power = ((energy[:, starts + block] - energy[:, starts]) / block).sum(axis=0)  # Unit channel weights
+
+    with np.errstate(divide='ignore'):
+        block_loudness = -0.691 + 10 * np.log10(block_power)
+    gated = block_power[block_loudness > ABSOLUTE_GATE]
+    if gated.size == 0:
+        return SILENCE_DB
+    relative = -0.691 + 10 * np.log10(gated.mean()) + RELATIVE_GATE
+    gated = block_power[(block_loudness > ABSOLUTE_GATE) & (block_loudness > relative)]
+    if gated.size == 0:
+        return SILENCE_DB
+    return float(-0.691 + 10 * np.log10(gated.mean()))
+
+
+def true_peak(y, sr):
+    """Peak of the 4x oversampled signal in dBTP."""
+    frames = y.shape[-1]
+    chunk = CHUNK_SECONDS * sr
+    pad = 64  # Context on each side so the polyphase filter has no edge transients
+    peak = 0.0
+    for start in range(0, frames, chunk):
+        stop = min(frames, start + chunk)
+        left, right = max(0, start - pad), min(frames, stop + pad)
+        oversampled = scipy.signal.resample_poly(y[:, left:right], TRUE_PEAK_OVERSAMPLE, 1, axis=-1)
+        first = (start - left) * TRUE_PEAK_OVERSAMPLE
+        last = first + (stop - start) * TRUE_PEAK_OVERSAMPLE
+        peak = max(peak, float(np.abs(oversampled[:, first:last]).max(initial=0.0)))
+    return to_db(peak, power=False)
+
+
+def analyze_signal(y, sr):
+    y = np.atleast_2d(np.asarray(y, dtype=np.float64))
+    return {
+        'lufs': integrated_loudness(y, sr),
+        'rms': to_db(np.mean(y ** 2)) if y.size else SILENCE_DB,
+        'true_peak': true_peak(y, sr),
+    }
+
+
+def analyze_file(path):
+    # Runs inside the process pool, so it reads the file itself rather than receiving a pickled array
+    y, sr = sf.read(path, dtype='float32', always_2d=True)
+    return analyze_signal(y.T, sr)
+
+
+def gain_for(lufs, target):
+    """Linear gain that brings a measured loudness to the target, limited to MAX_MATCH_DB either way."""
+    return float(10 ** (min(max(target - lufs, -MAX_MATCH_DB), MAX_MATCH_DB) / 20))
+
+
+class LoudnessAnalyzer(QObject):
+    """Cached, pooled loudness measurement of audio files."""
+
+    analyzed = pyqtSignal(str, dict)  # file path, measurement
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cache = JsonCache('loudness')
+        self.relay = TaskRelay(self)
+        self.relay.finished.connect(self.store)
+        self.relay.failed.connect(lambda tag, error: print(f"Loudness analysis failed for {tag[0]}: {error}"))
+        self.generation = 0  # Bumped by reset, results requested before it are cached but not announced
+
+    def request(self, path):
+        digest = file_hash(path)
+        cached = self.cache.get(digest)
+        if cached is not None:
+            self.analyzed.emit(path, cached)
+        else:
+            self.relay.submit((path, digest, self.generation), process_pool(), analyze_file, path)
+
+    def reset(self):
+        # A measurement still in flight belongs to the files loaded before the reset
+        self.generation += 1
+
+    def store(self, tag, result):
+        path, digest, generation = tag
+        self.cache.put(digest, result)
+        self.cache.save()
+        if generation == self.generation:
+            self.analyzed.emit(path, result)
+
+
+def analyze_library(root):
+    """Batch job: measure every WAV under root, reusing and filling the shared cache."""
+    cache = JsonCache('loudness')
+    paths = []
+    for directory, _, files in os.walk(root):
+        paths.extend(os.path.join(directory, name) for name in files if name.lower().endswith('.wav'))
+
+    pending = {}
+    results = {}
+    for path in paths:
+        digest = file_hash(path)
+        cached = cache.get(digest)
+        if cached is not None:
+            results[path] = cached
+        else:
+            pending[process_pool().submit(analyze_file, path)] = (path, digest)
+
+    for future, (path, digest) in pending.items():
+        try:
+            results[path] = future.result()
+        except Exception as e:
+            print(f"Loudness analysis failed for {path}: {e}")
+            continue
+        cache.put(digest, results[path])
+    cache.save()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure loudness of every WAV under a folder")
+    parser.add_argument('root')
+    args = parser.parse_args()
+    for path, result in sorted(analyze_library(args.root).items()):
+        print(f"{result['lufs']:7.1f} LUFS {result['rms']:7.1f} dB RMS {result['true_peak']:6.1f} dBTP  {path}")
+    sys.exit(0)
@@ -0,0 +1,86 @@
+import numpy as np
+from Spectrogram import stft_power
+
+CHUNK_FRAMES = 1 << 18  # Frames processed per step, so temporaries stay a few MB whatever the file length
+SUMMARY_NFFT = 4096
+BAND_CENTERS = 31.25 * 2.0 ** np.arange(10)  # Octave bands from 31 Hz to 16 kHz
+DEPTH_FLOOR = -120.0
+
+
+def chunks(frames):
+    for start in range(0, frames, CHUNK_FRAMES):
+        yield start, min(frames, start + CHUNK_FRAMES)
+
+
+def read_chunk(data, start, stop, channels, out):
+    """Copy data[..., start:stop] into `out`, zero outside the data, down-mixed if the channel counts differ."""
+    data = np.atleast_2d(data)
+    out[...] = 0
+    first, last = max(start, 0), min(stop, data.shape[-1])
+    if last > first:
+        block = data[:, first:last]
+        if block.shape[0] != channels:
+            block = block.mean(axis=0, keepdims=True)
+        out[:, first - start:last - start] = block
+    return out
+
+
+def matching_gain(reference, take, lag, channels):
+    """Least-squares gain that makes the aligned take cancel the reference best."""
+    scratch = np.empty((2, channels, CHUNK_FRAMES), dtype=np.float32)
+    cross = energy = 0.0
+    for start, stop in chunks(np.atleast_2d(reference).shape[-1]):
+        r = read_chunk(reference, start, stop, channels, scratch[0, :, :stop - start])
+        t = read_chunk(take, start + lag, stop + lag, channels, scratch[1, :, :stop - start])
+        cross += float(np.einsum('ij,ij->', r, t, dtype=np.float64))
+        energy += float(np.einsum('ij,ij->', t, t, dtype=np.float64))
+    return cross / energy if energy > 0 else 1.0
+
+
+def band_depths(freqs, reference_power, residual_power):
+    """Residual energy relative to the reference in each octave band, in dB."""
+    depths = []
+    for center in BAND_CENTERS:
+        band = (freqs >= center / np.sqrt(2)) & (freqs < center * np.sqrt(2))
+        reference_energy = reference_power[band].sum()
+        residual_energy = residual_power[band].sum()
+        if reference_energy > 0:
+            with np.errstate(divide='ignore'):
+                depth = 10 * np.log10(residual_energy / reference_energy)
+            depths.append((float(center), float(max(depth, DEPTH_FLOOR))))
+    return depths
+
+
+def null_test(reference, take, lag, sr):
+    """Subtract a gain-matched take from a reference, `lag` samples into the take.
+
+    Returns the residual on the reference's timeline, the gain applied to the
+    take and the residual energy per octave band relative to the reference.
+    Both passes work chunk by chunk and write straight into the one output array.
+    """
+    reference_channels = np.atleast_2d(reference).shape[0]
+    channels = reference_channels if reference_channels == np.atleast_2d(take).shape[0] else 1
+    frames = np.atleast_2d(reference).shape[-1]
+    gain = matching_gain(reference, take, lag, channels)
+
+    residual = np.empty((channels, frames), dtype=np.float32)
+    scratch = np.empty((channels, CHUNK_FRAMES), dtype=np.float32)
+    reference_power = np.zeros(SUMMARY_NFFT // 2 + 1)
+    residual_power = np.zeros(SUMMARY_NFFT // 2 + 1)
+    for start, stop in chunks(frames):
+        out = read_chunk(take, start + lag, stop + lag, channels, residual[:, start:stop])
+        out *= -gain
+        out += read_chunk(reference, start, stop, channels, scratch[:, :stop - start])
+        reference_power += stft_power(scratch[:, :stop - start], SUMMARY_NFFT, SUMMARY_NFFT // 2).sum(axis=0)
+        residual_power += stft_power(out, SUMMARY_NFFT, SUMMARY_NFFT // 2).sum(axis=0)
+
+    freqs = np.fft.rfftfreq(SUMMARY_NFFT, 1 / sr)
+    return (residual[0] if channels == 1 else residual), gain, band_depths(freqs, reference_power, residual_power)
+
+
+def format_summary(gain, depths):
+    lines = [f"Take gain: {20 * np.log10(max(gain, 1e-12)):+.1f} dB"]
+    for center, depth in depths:
+        label = f"{center / 1000:g} kHz" if center >= 1000 else f"{center:g} Hz"
+        lines.append(f"{label:>10}: {depth:6.1f} dB")
+    return "\n".join(lines)
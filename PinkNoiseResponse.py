@@ -0,0 +1,87 @@
+import os
+import numpy as np
+import scipy.fft
+import scipy.signal
+import soundfile as sf
+from PyQt5.QtCore import QObject, pyqtSignal
+from AnalysisCache import cache_path, file_hash
+from BackgroundTasks import TaskRelay, process_pool
+
+SEGMENT_SECONDS = 1 / 6  # About 6 Hz resolution
+SEGMENTS_PER_BATCH = 256  # Segments transformed together per block read
+MIN_FREQUENCY = 20.0
+MAX_FREQUENCY = 20000.0
+
+
+def segment_length(sr):
+    return int(2 ** np.ceil(np.log2(sr * SEGMENT_SECONDS)))
+
+
+def welch_psd(path):
+    """Welch PSD of a recording, averaged over channels, read block by block.
+
+    Each block holds a batch of half-overlapping Hann segments that are
+    transformed in one call, so the file is never fully decoded at once.
+    """
+    info = sf.info(path)
+    nperseg = segment_length(info.samplerate)
+    hop = nperseg // 2
+    window = scipy.signal.get_window('hann', nperseg).astype(np.float32)
+    power = np.zeros(nperseg // 2 + 1)
+    segments = 0
+
+    # Blocks overlap by one hop so the segment grid continues seamlessly across block edges
+    for block in sf.blocks(path, blocksize=hop * (SEGMENTS_PER_BATCH + 1), overlap=hop, dtype='float32', always_2d=True):
+        if block.shape[0] < nperseg:
+            continue
+        frames = np.lib.stride_tricks.sliding_window_view(block.T, nperseg, axis=-1)[:, ::hop, :]
+        spectrum = scipy.fft.rfft(frames * window, axis=-1)
+        power += (np.abs(spectrum) ** 2).sum(axis=(0, 1))
+        segments += frames.shape[0] * frames.shape[1]
+
+    if segments == 0:
+        raise ValueError(f"{os.path.basename(path)} is shorter than one analysis segment")
+    psd = power / (segments * info.samplerate * np.sum(window ** 2))
+    psd[1:-1] *= 2  # One-sided
+    freqs = np.fft.rfftfreq(nperseg, 1 / info.samplerate)
+    return freqs, psd
+
+
+def pink_noise_response(path):
+    """Magnitude response in dB implied by a pink-noise recording.
+
+    Pink noise has a 1/f power spectrum, so multiplying the measured PSD by f
+    removes the excitation and leaves the response of the recording chain.
+    """
+    freqs, psd = welch_psd(path)
+    band = (freqs >= MIN_FREQUENCY) & (freqs <= MAX_FREQUENCY)
+    freqs, psd = freqs[band], psd[band]
+    with np.errstate(divide='ignore'):
+        response = 10 * np.log10(psd * freqs)
+    return freqs, np.nan_to_num(response, neginf=-120.0)
+
+
+class ResponseAnalyzer(QObject):
+    """Cached, pooled frequency-response estimates from pink-noise recordings."""
+
+    analyzed = pyqtSignal(str, object, object)  # name, frequencies, response in dB
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.relay = TaskRelay(self)
+        self.relay.finished.connect(self.store)
+        self.relay.failed.connect(lambda tag, error: print(f"Pink noise analysis failed for {tag[0]}: {error}"))
+
+    def request(self, path, name):
+        cached = cache_path('response', f"{file_hash(path)}.npz")
+        if os.path.exists(cached):
+            with np.load(cached) as data:
+                self.analyzed.emit(name, data['freqs'], data['response'])
+        else:
+            self.relay.submit((name, cached), process_pool(), pink_noise_response, path)
+
+    def store(self, tag, result):
+        name, cached = tag
+        freqs, response = result
+        np.savez(cached, freqs=freqs, response=response)
+        self.analyzed.emit(name, freqs, response)
@@ -0,0 +1,352 @@
+import collections
+import numpy as np
+from PyQt5.QtCore import QObject, QIODevice, QTimer, pyqtSignal
+from PyQt5.QtMultimedia import QAudio, QAudioFormat, QAudioOutput
+
+OUTPUT_CHANNELS = 2  # The sink is always stereo, mono sources are duplicated on the fly
+SAMPLE_BYTES = 2  # 16-bit signed PCM
+CROSSFADE_SECONDS = 0.005  # Length of the blend across the loop seam
+BUFFER_SECONDS = 0.05  # Keep the device queue short so loop edits are heard quickly
+POSITION_INTERVAL_MS = 10
+
+
+def prepare_buffer(y):
+    """Return a float32 (channels, frames) C-contiguous array for a librosa signal."""
+    buffer = np.asarray(y, dtype=np.float32)
+    if buffer.ndim == 1:
+        buffer = buffer[np.newaxis, :]
+    return np.ascontiguousarray(buffer)
+
+
+class LoopingSource(QIODevice):
+    """Pull-mode device that renders PCM straight from an in-memory numpy buffer.
+
+    The loop region is enforced while rendering, so the seam lands on the exact
+    sample. The last few milliseconds before the loop end are crossfaded with the
+    samples leading into the loop start, which makes the wrap continuous. Swapping
+    the buffer keeps the frame position and blends the old buffer out over the
+    same short crossfade, so A/B switches are neither gapped nor clicked.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.buffer = np.zeros((1, 0), dtype=np.float32)
+        self.previous = None  # Buffer being faded out after a swap
+        self.previous_frame = 0
+        self.previous_gain = 1.0
+        self.fade_remaining = 0
+        self.frame = 0  # Next frame that will be handed to the sink
+        self.loop_start = 0
+        self.loop_end = 0
+        self.crossfade = 0
+        self.gain = 1.0
+        self.rendered = 0  # Total frames handed to the sink since the last reset
+        self.history = collections.deque(maxlen=256)  # (rendered, frame) at every discontinuity
+        self.reset_history()
+
+    def set_buffer(self, buffer, crossfade, gain=1.0, frame=None):
+        if self.buffer.shape[1] > 0 and buffer is not self.buffer:
+            self.previous = self.buffer
+            self.previous_frame = self.frame
+            self.previous_gain = self.gain
+            self.fade_remaining = crossfade
+        self.buffer = buffer
+        self.gain = gain
+        self.crossfade = crossfade
+        length = buffer.shape[1]
+        if self.loop_end <= self.loop_start or self.loop_end > length:
+            self.loop_start, self.loop_end = 0, length
+        if frame is not None and frame != self.frame:
+            self.seek(frame)  # The new buffer continues from a different frame, e.g. when it is time-shifted
+        elif self.frame >= length:
+            self.seek(self.loop_start)
+
+    def set_loop(self, start, end):
+        length = self.buffer.shape[1]
+        start = max(0, min(int(start), length))
+        end = max(0, min(int(end), length))
+        if end <= start:
+            start, end = 0, length
+        self.loop_start, self.loop_end = start, end
+
+    def seek(self, frame):
+        self.frame = max(0, min(int(frame), max(self.buffer.shape[1] - 1, 0)))
+        self.history.append((self.rendered, self.frame))
+
+    def reset_history(self):
+        self.rendered = 0
+        self.history.clear()
+        self.history.append((0, self.frame))
+
+    def frame_at(self, rendered):
+        # Map a count of frames consumed by the sink back onto the source timeline
+        for start, frame in reversed(self.history):
+            if start <= rendered:
+                position = frame + (rendered - start)
+                if position >= self.loop_end > self.loop_start and frame < self.loop_end:
+                    position = self.loop_start + (position - self.loop_start) % (self.loop_end - self.loop_start)
+                return position
+        return self.history[0][1]
+
+    def render_buffer(self, buffer, frame, frames, gain=1.0):
+        """Render `frames` of `buffer` from `frame` without advancing the source.
+
+        Returns the stereo block, the frame to continue from and the block offsets
+        at which the loop wrapped.
+        """
+        channels = min(buffer.shape[0], OUTPUT_CHANNELS)
+        out = np.zeros((channels, frames), dtype=np.float32)
+        wraps = []
+        length = self.loop_end - self.loop_start
+        if length <= 0:
+            return out, frame, wraps
+
+        filled = 0
+        while filled < frames:
+            if frame >= self.loop_end:
+                frame = self.loop_start
+                wraps.append(filled)
+            count = min(frames - filled, self.loop_end - frame)
+            available = buffer[:channels, frame:frame + count]  # Shorter for a faded-out buffer
+            out[:, filled:filled + available.shape[1]] = available
+
+            # Blend the tail of the loop into the audio that leads up to the loop start
+            fade = min(self.crossfade, length)
+            fade_start = self.loop_end - fade
+            if fade > 0 and frame + count > fade_start:
+                first = max(frame, fade_start)
+                offsets = np.arange(first - fade_start, frame + count - fade_start)
+                head_index = self.loop_start - fade + offsets
+                head = np.zeros((channels, len(offsets)), dtype=np.float32)
+                valid = (head_index >= 0) & (head_index < buffer.shape[1])
+                head[:, valid] = buffer[:channels, head_index[valid]]
+                ramp = (offsets + 0.5) / fade
+                fade_in = np.sin(0.5 * np.pi * ramp).astype(np.float32)
+                fade_out = np.cos(0.5 * np.pi * ramp).astype(np.float32)
+                segment = out[:, filled + first - frame:filled + count]
+                segment *= fade_out
+                segment += head * fade_in
+
+            frame += count
+            filled += count
+
+        if gain != 1.0:
+            out *= gain
+        if channels < OUTPUT_CHANNELS:
+            out = np.repeat(out, OUTPUT_CHANNELS, axis=0)
+        return out, frame, wraps
+
+    def render(self, frames):
+        out, frame, wraps = self.render_buffer(self.buffer, self.frame, frames, self.gain)
+
+        if self.fade_remaining > 0 and self.previous is not None:
+            count = min(self.fade_remaining, frames)
+            previous, self.previous_frame, _ = self.render_buffer(self.previous, self.previous_frame, count, self.previous_gain)
+            offset = self.crossfade - self.fade_remaining
+            ramp = (np.arange(offset, offset + count) + 0.5) / self.crossfade
+            out[:, :count] *= np.sin(0.5 * np.pi * ramp).astype(np.float32)
+            out[:, :count] += previous * np.cos(0.5 * np.pi * ramp).astype(np.float32)
+            self.fade_remaining -= count
+            if self.fade_remaining == 0:
+                self.previous = None
+
+        for offset in wraps:
+            self.history.append((self.rendered + offset, self.loop_start))
+        self.frame = frame
+        self.rendered += frames
+        return out
+
+    def readData(self, maxlen):
+        frames = maxlen // (OUTPUT_CHANNELS * SAMPLE_BYTES)
+        if frames <= 0 or self.buffer.shape[1] == 0:
+            return bytes()
+        block = self.render(frames)
+        pcm = (np.clip(block, -1.0, 1.0) * 32767).astype('<i2')
+        return pcm.T.tobytes()  # Interleave the channels
+
+    def writeData(self, data):
+        return 0
+
+    def bytesAvailable(self):
+        # A looping source never runs dry
+        return (1 << 20) + super().bytesAvailable()
+
+    def isSequential(self):
+        return True
+
+
+class PlaybackEngine(QObject):
+    """Gapless looping playback of preloaded, keyed buffers through QAudioOutput.
+
+    Positions and loop points are given on a shared timeline. Each source can
+    carry an offset, the time at which the timeline's zero lands in that source,
+    so aligned recordings switch on the same moment rather than the same sample.
+    """
+
+    positionChanged = pyqtSignal(float)  # Seconds on the shared timeline
+    stateChanged = pyqtSignal(bool)  # True while playing
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.source = LoopingSource(self)
+        self.source.open(QIODevice.ReadOnly)
+        self.output = None
+        self.sources = {}  # key -> (prepared buffer, sample rate)
+        self.gains = {}  # key -> linear playback gain, e.g. for loudness matching
+        self.offsets = {}  # key -> seconds this source lags the shared timeline, e.g. from alignment
+        self.loop = (0.0, 0.0)  # Loop region on the shared timeline, empty means the whole source
+        self.current_key = None
+        self.sample_rate = 0
+        self.playing = False
+        self.live = False  # The sink has consumed audio since the last reset
+        self.timer = QTimer(self)
+        self.timer.setInterval(POSITION_INTERVAL_MS)
+        self.timer.timeout.connect(self.emit_position)
+
+    def create_output(self, sample_rate):
+        if self.output is not None:
+            self.output.stop()
+            self.output.deleteLater()
+        audio_format = QAudioFormat()
+        audio_format.setSampleRate(int(sample_rate))
+        audio_format.setChannelCount(OUTPUT_CHANNELS)
+        audio_format.setSampleSize(SAMPLE_BYTES * 8)
+        audio_format.setCodec("audio/pcm")
+        audio_format.setByteOrder(QAudioFormat.LittleEndian)
+        audio_format.setSampleType(QAudioFormat.SignedInt)
+        self.output = QAudioOutput(audio_format, self)
+        self.output.setBufferSize(int(sample_rate * BUFFER_SECONDS) * OUTPUT_CHANNELS * SAMPLE_BYTES)
+        self.sample_rate = int(sample_rate)
+        self.live = False
+
+    def add_source(self, key, y, sr):
+        # Sources are prepared once up front so selecting one later is a pointer swap
+        self.sources[key] = (prepare_buffer(y), int(sr))
+        if key == self.current_key:
+            self.source.buffer = self.sources[key][0]  # Same samples on a new backing store, no fade needed
+
+    def remove_source(self, key):
+        self.sources.pop(key, None)
+        self.gains.pop(key, None)
+        self.offsets.pop(key, None)
+        if key == self.current_key:
+            self.unload()
+
+    def offset(self, key=None):
+        return self.offsets.get(self.current_key if key is None else key, 0.0)
+
+    def select(self, key):
+        buffer, sr = self.sources[key]
+        if sr != self.sample_rate:
+            # A different rate needs a new sink, so this is the one switch that restarts
+            position = self.position()
+            was_playing = self.playing
+            self.current_key = key
+            self.create_output(sr)
+            self.playing = False
+            self.source.set_buffer(buffer, int(sr * CROSSFADE_SECONDS), self.gains.get(key, 1.0))
+            self.source.seek((position + self.offset()) * sr)
+            self.apply_loop()
+            if was_playing:
+                self.play()
+        else:
+            # Continue from the same moment of the timeline, which is the same frame unless the offsets differ
+            shift = round((self.offset(key) - self.offset()) * sr)
+            self.current_key = key
+            self.source.set_buffer(buffer, int(sr * CROSSFADE_SECONDS), self.gains.get(key, 1.0), self.source.frame + shift)
+            self.apply_loop()
+
+    def set_gain(self, key, gain):
+        self.gains[key] = gain
+        if key == self.current_key:
+            self.source.gain = gain
+
+    def set_offset(self, key, seconds):
+        self.offsets[key] = seconds
+        if key == self.current_key:
+            self.apply_loop()
+
+    def unload(self):
+        self.stop()
+        self.current_key = None
+        self.source.set_buffer(np.zeros((1, 0), dtype=np.float32), 0)
+        self.source.seek(0)
+
+    def clear_sources(self):
+        self.unload()
+        self.sources.clear()
+        self.gains.clear()
+        self.offsets.clear()
+
+    def restart(self):
+        # Start the sink from scratch so no stale audio is left in its queue
+        self.output.stop()
+        self.source.reset_history()
+        self.output.start(self.source)
+        self.live = True
+
+    def play(self):
+        if self.output is None or self.source.buffer.shape[1] == 0:
+            return
+        if self.live and self.output.state() == QAudio.SuspendedState:
+            self.output.resume()
+        else:
+            self.restart()
+        self.playing = True
+        self.timer.start()
+        self.stateChanged.emit(True)
+
+    def pause(self):
+        if self.output is not None and self.playing:
+            self.output.suspend()
+        self.playing = False
+        self.timer.stop()
+        self.stateChanged.emit(False)
+        self.emit_position()
+
+    def stop(self):
+        if self.output is not None:
+            self.output.stop()
+        self.live = False
+        self.playing = False
+        self.timer.stop()
+        self.source.seek(self.source.loop_start)
+        self.stateChanged.emit(False)
+
+    def seek(self, seconds):
+        if self.sample_rate == 0:
+            return
+        self.source.seek((seconds + self.offset()) * self.sample_rate)
+        if self.playing:
+            self.restart()
+        else:
+            self.live = False
+        self.emit_position()
+
+    def set_loop(self, start, end):
+        self.loop = (start, end)
+        self.apply_loop()
+
+    def apply_loop(self):
+        if self.sample_rate == 0:
+            return
+        start, end = self.loop
+        if end > start:
+            start, end = start + self.offset(), end + self.offset()
+        self.source.set_loop(round(start * self.sample_rate), round(end * self.sample_rate))
+
+    def position(self):
+        if self.sample_rate == 0:
+            return 0.0
+        if not self.live:
+            return self.source.frame / self.sample_rate - self.offset()
+        played = self.output.processedUSecs() * self.sample_rate // 1000000
+        return self.source.frame_at(played) / self.sample_rate - self.offset()
+
+    def duration(self):
+        if self.sample_rate == 0:
+            return 0.0
+        return self.source.buffer.shape[1] / self.sample_rate
+
+    def emit_position(self):
+        self.positionChanged.emit(self.position())
@@ -1,24 +1,61 @@
 import os
 import sys
-from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QLabel, QScrollArea, QFrame, QTreeWidget, QTreeWidgetItem, QHBoxLayout, QListWidget
+from operator import itemgetter
+from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QLabel, QScrollArea, QFrame, QTreeView, QHBoxLayout, QListWidget,
+                             QListWidgetItem, QLineEdit, QPushButton)
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont, QBrush, QColor
+from PyQt5.QtGui import QFont
 from ToggleButton import ToggleStack  # Import the ToggleStack class
-
-# Reads in folder names and establishes necessary lists
+from WavIndex import wav_index, AUDIO_FILES
+from BackgroundTasks import TaskRelay, thread_pool
+from Catalog import shared_catalog, HYPERX_COMPANY
+from CatalogDB import catalog_db
+from CatalogWatcher import catalog_watcher
+from CatalogModel import CatalogModel
+from SelectionList import SelectionList
+from CatalogSearch import SearchIndex
+
+# Folder of Company_Model_Pattern_Position_Config comparison folders
 path = 'C:\\Users\\TaRi525\\Documents\\Hyper X Intern Project\\GeneratedFolders'
-try:
-    names = os.listdir(path)
-except Exception as e:
-    print(f"Error reading directory: {e}")
-    names = []
-
-info = [name.split('_') for name in names]
-hyperx_microphones = [thing for thing in info if thing[0] == "HyperX"]
-competitor_microphones = [thing for thing in info if thing[0] != "HyperX"]
 
-hyperx_microphones.sort()
-competitor_microphones.sort()
+MAX_RESULTS = 500  # Search results listed at once, checking all of them still covers every match
+
+# View name -> sections of (accepts, field order, background colour, selection colour, title)
+VIEW_SECTIONS = {
+    'Product': [
+        (lambda mic: mic[0] == HYPERX_COMPANY, (1, 2, 3, 4), "#DEE0F6", "#BBD2F5", "Hyper X"),
+        (lambda mic: mic[0] != HYPERX_COMPANY, (0, 1, 2, 3, 4), "#F6DEDE", "#F4BFBF", "Competitors"),
+    ],
+    # Pattern > Company > Product > Position > Effect
+    'Pattern': [(lambda mic: True, (2, 0, 1, 3, 4), "#DEE0F6", "#BBD2F5", None)],
+    # Effect > Company > Product > Pattern > Position
+    'Effects': [(lambda mic: True, (4, 0, 1, 2, 3), "#DEE0F6", "#BBD2F5", None)],
+}
+
+
+def audio_status(folder_path, stamps):
+    """Text colour and tooltip of a folder row from its header index entries."""
+    problems = wav_index().folder_status(folder_path, save=False, stamps=stamps)
+    if problems:
+        return "#9a9a9a", "\n".join(f"{file_name}: {reason}" for file_name, reason in problems.items())
+    durations = [f"{file_name}: {wav_index().info(os.path.join(folder_path, file_name), save=False, stamp=stamps[file_name])['duration']:.1f} s"
+                 for file_name in AUDIO_FILES]
+    return "black", "\n".join(durations)
+
+
+def folder_statuses(root, folder_names):
+    # Runs on a pool thread, headers of unchanged files are index lookups and only new ones are read
+    stamps = catalog_db().files(root)
+    statuses = {folder_name: audio_status(os.path.join(root, folder_name), stamps.get(folder_name, {}))
+                for folder_name in folder_names}
+    wav_index().save()
+    return statuses
+
+
+def index_library(root):
+    # Only folders whose contents changed since the last run are reread and their headers reparsed
+    catalog_db().refresh(root)
+    return folder_statuses(root, catalog_db().folder_names(root))
 
 class ScrollWindow(QWidget):
     def __init__(self):
@@ -27,6 +64,10 @@ class ScrollWindow(QWidget):
         self.setWindowTitle("HyperX Microphone Comparisons")
         self.setGeometry(100, 100, 2000, 1600)
 
+        # Folder names are parsed once into an index shared with the other selection windows
+        self.catalog = shared_catalog(path)
+        self.current_view = 'Product'
+
         main_layout = QHBoxLayout()
         self.setLayout(main_layout)
 
@@ -56,8 +97,32 @@ class ScrollWindow(QWidget):
 
         left_layout.addLayout(title_layout)
 
+        # Search box over every folder, its results replace the trees while there is a query
+        search_layout = QHBoxLayout()
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search microphones")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.setStyleSheet("font-size: 20px; font-family: 'Forma DJR Micro'; background-color: #F0F0F0; border-radius: 10px; padding: 6px;")
+        self.search_box.textChanged.connect(self.search)
+        search_layout.addWidget(self.search_box)
+
+        self.check_results_button = QPushButton("Check all")
+        self.check_results_button.setStyleSheet("font-size: 20px; font-family: 'Forma DJR Micro'; background-color: #DEE0F6; border-radius: 10px; padding: 6px 12px;")
+        self.check_results_button.clicked.connect(self.check_search_results)
+        self.check_results_button.hide()
+        search_layout.addWidget(self.check_results_button)
+        left_layout.addLayout(search_layout)
+
+        self.search_index = None
+        self.search_results = []
+        self.results_list = QListWidget()
+        self.results_list.setStyleSheet("font-size: 20px; font-family: 'Forma DJR Display'; background-color: #DEE0F6; border-radius: 10px;")
+        self.results_list.itemChanged.connect(self.result_toggled)
+        self.results_list.hide()
+        left_layout.addWidget(self.results_list)
+
         # Scroll Area for Microphone List
-        scroll_area = QScrollArea()
+        scroll_area = self.scroll_area = QScrollArea()
         scroll_area.setWidgetResizable(True)
         scroll_area.setStyleSheet("""
     QScrollBar:vertical {
@@ -99,8 +164,23 @@ class ScrollWindow(QWidget):
         for toggle_switch in self.toggle_stack.toggle_switches:
             toggle_switch.toggled.connect(self.handle_toggle)
 
-        # Initialize the tree layout
-        self.add_microphone_sections()
+        # Folders without playable audio are greyed out once the library headers are indexed
+        self.audio_statuses = {}  # folder name -> (text colour, tooltip), worked out on the pool
+        self.index_relay = TaskRelay(self)
+        self.index_relay.finished.connect(self.audio_index_ready)
+        self.index_relay.failed.connect(lambda tag, error: print(f"Error indexing {tag[0]}: {error}"))
+        self.index_relay.submit((path, None), thread_pool(), index_library, path)
+
+        # Folders that arrive or disappear while the window is open are patched into the current trees
+        catalog_watcher().watch(self.catalog)
+        catalog_watcher().catalogChanged.connect(self.apply_catalog_delta)
+
+        # Each view is built the first time it is shown and kept, checked folders are shared between them
+        self.views = {}
+        self.selected = set()
+        self.folder_paths = {}
+        self.selection_version = 0
+        self.synced = {}  # view name -> selection version its trees last showed
 
         main_layout.addLayout(left_layout, 1)  # Add left_layout to main_layout
         
@@ -116,8 +196,12 @@ class ScrollWindow(QWidget):
 
         # List widget to display checked items
         self.checked_list_widget = QListWidget()
+        self.checked_rows = SelectionList(self.checked_list_widget)
         right_layout.addWidget(self.checked_list_widget)
 
+        # Initialize the tree layout
+        self.show_view('Product')
+
         self.show()
 
     def set_left_panel_width(self):
@@ -130,377 +214,169 @@ class ScrollWindow(QWidget):
         self.set_left_panel_width()  # Adjust width on resize
         super().resizeEvent(event)
 
-    def add_microphone_sections(self):
-        # Clear the existing layout
-        for i in reversed(range(self.scroll_layout.count())):
-            widget = self.scroll_layout.itemAt(i).widget()
-            if widget is not None:
-                widget.deleteLater()
-            else:
-                self.scroll_layout.removeItem(self.scroll_layout.itemAt(i))
-
-        # HyperX section
-        self.hyperx_tree = QTreeWidget()
-        self.hyperx_tree.setHeaderHidden(True)
-        self.hyperx_tree.itemChanged.connect(self.on_item_changed)
-        self.hyperx_tree.setStyleSheet("""
-            QTreeWidget {
-                background-color: #DEE0F6;
-                border-radius: 10px;
-                margin-bottom: 20px;
-            }
-            QTreeWidget::item {
-                color: black;
-            }
-            QTreeWidget::item:selected {
-                background-color: #BBD2F5;
-            }
-        """)
-
-        hyperx_font = QFont("Forma DJR Display", 20)
-        hyperx_title = QTreeWidgetItem(["Hyper X"])
-        hyperx_title.setFont(0, hyperx_font)
-        hyperx_title.setFlags(hyperx_title.flags() | Qt.ItemIsUserCheckable)
-        hyperx_title.setCheckState(0, Qt.Unchecked)
-        self.hyperx_tree.addTopLevelItem(hyperx_title)
-
-        self.add_microphone_items(hyperx_title, hyperx_microphones, hyperx_font, False)
-
-        # Competitor section
-        self.competitor_tree = QTreeWidget()
-        self.competitor_tree.setHeaderHidden(True)
-        self.competitor_tree.itemChanged.connect(self.on_item_changed)
-        self.competitor_tree.setStyleSheet("""
-            QTreeWidget {
-                background-color: #F6DEDE;
-                border-radius: 10px;
-            }
-            QTreeWidget::item {
-                color: black;
-            }
-            QTreeWidget::item:selected {
-                background-color: #F4BFBF;
-            }
-        """)
-
-        competitor_font = QFont("Forma DJR Display", 20)
-        competitor_title = QTreeWidgetItem(["Competitors"])
-        competitor_title.setFont(0, competitor_font)
-        competitor_title.setFlags(competitor_title.flags() | Qt.ItemIsUserCheckable)
-        competitor_title.setCheckState(0, Qt.Unchecked)
-        self.competitor_tree.addTopLevelItem(competitor_title)
-
-        self.add_microphone_items(competitor_title, competitor_microphones, competitor_font, True)
-
-        self.scroll_layout.addWidget(self.hyperx_tree)
-        self.scroll_layout.addWidget(self.competitor_tree)
-
-
-    def add_microphone_items(self, parent_item, microphones, font, is_competitor):
-        if is_competitor:
-            companies = {}
-            for mic in microphones:
-                company = mic[0]
-                model = mic[1]
-                pattern = mic[2]
-                position = mic[3]
-                config = mic[4]
-
-                if company not in companies:
-                    companies[company] = self.find_or_create_child(parent_item, company, font)
-                company_item = companies[company]
-
-                model_item = self.find_or_create_child(company_item, model, font)
-                pattern_item = self.find_or_create_child(model_item, pattern, font)
-                position_item = self.find_or_create_child(pattern_item, position, font)
-                self.find_or_create_child(position_item, config, font)
+    def show_view(self, view):
+        """Show the trees of one view, building them on first use and keeping them for the next switch."""
+        if view not in self.views:
+            self.views[view] = self.build_view(VIEW_SECTIONS[view])
+        for name, (container, _) in self.views.items():
+            container.setVisible(name == view)
+        self.current_view = view
+        # Views that missed a selection change catch up with the shared set of checked folders
+        if self.synced.get(view) != self.selection_version:
+            for _, tree in self.views[view][1]:
+                tree.model().set_checked_records(self.selected)
+            self.synced[view] = self.selection_version
+
+    def build_view(self, sections):
+        """One tree per section, each a lazy model over the catalog records the section accepts.
+
+        A section is (accepts, field order, background colour, selection colour, title).
+        The field order permutes a folder's fields into the branch it is shown
+        under, so every view shares the same records.
+        """
+        container = QWidget()
+        layout = QVBoxLayout(container)
+        layout.setContentsMargins(0, 0, 0, 0)
+        font = QFont("Forma DJR Display", 20)
+        trees = []
+        for accepts, order, background, selected, title in sections:
+            prefix = (title,) if title else ()
+            fields = itemgetter(*order)
+            model = CatalogModel([mic for mic in self.catalog.records() if len(mic) >= 5 and accepts(mic)],
+                                 lambda mic, prefix=prefix, fields=fields: prefix + fields(mic), font,
+                                 status_of=self.folder_status, keep_depth=1 if title else 0, parent=self)
+            if title:
+                model.branch((title,))  # Shown even while the section is empty
+            if self.selected:
+                model.set_checked_records(self.selected)
+            model.selectionChanged.connect(self.selection_changed)
+
+            tree = QTreeView()
+            tree.setHeaderHidden(True)
+            tree.setUniformRowHeights(True)  # Lets the view lay out only the rows on screen
+            tree.setModel(model)
+            tree.setStyleSheet("""
+                QTreeView {
+                    background-color: %s;
+                    border-radius: 10px;
+                    margin-bottom: 20px;
+                }
+                QTreeView::item {
+                    color: black;
+                }
+                QTreeView::item:selected {
+                    background-color: %s;
+                }
+            """ % (background, selected))
+            layout.addWidget(tree)
+            trees.append((accepts, tree))
+        self.scroll_layout.addWidget(container)
+        return container, trees
+
+    def folder_path(self, mic):
+        # Joined once per folder, the list is then updated by path
+        folder_path = self.folder_paths.get(mic)
+        if folder_path is None:
+            folder_path = self.folder_paths[mic] = os.path.join(path, "_".join(mic))
+        return folder_path
+
+    def selection_changed(self, added, removed):
+        # Views other than the current one report catalog deltas too, so the set decides what really changed
+        removed = [mic for mic in removed if mic in self.selected]
+        added = [mic for mic in added if mic not in self.selected]
+        if not added and not removed:
+            return
+        self.selected.difference_update(removed)
+        self.selected.update(added)
+        self.selection_version += 1
+        self.synced[self.current_view] = self.selection_version
+        self.checked_rows.update([self.folder_path(mic) for mic in added], [self.folder_path(mic) for mic in removed])
+
+    def apply_catalog_delta(self, catalog, added, removed, changed):
+        if catalog is not self.catalog:
+            return
+        added_records = [mic for mic in (tuple(name.split('_')) for name in added) if len(mic) >= 5]
+        removed_records = [mic for mic in (tuple(name.split('_')) for name in removed) if len(mic) >= 5]
+        for _, trees in self.views.values():
+            for accepts, tree in trees:
+                model = tree.model()
+                model.remove_records([mic for mic in removed_records if accepts(mic)])
+                model.add_records([mic for mic in added_records if accepts(mic)])
+        if self.search_index is not None:
+            for mic in removed_records:
+                self.search_index.remove(mic)
+            for mic in added_records:
+                self.search_index.add(mic)
+        for name in removed:
+            self.audio_statuses.pop(name, None)
+        self.mark_audio_status(set(added_records) | {tuple(name.split('_')) for name in changed})
+
+    def audio_index_ready(self, tag, statuses):
+        _, records = tag
+        self.audio_statuses.update(statuses)
+        for _, trees in self.views.values():
+            for _, tree in trees:
+                tree.model().refresh_status(records)
+
+    def mark_audio_status(self, records):
+        # The statuses of new or changed folders are worked out on the pool, their rows are redrawn when they arrive
+        if records:
+            self.index_relay.submit((path, records), thread_pool(), folder_statuses, path, ["_".join(mic) for mic in records])
+
+    def folder_status(self, mic):
+        """Text colour and tooltip of a folder row, or None until its headers are indexed."""
+        return self.audio_statuses.get("_".join(mic))
+
+    def set_records_checked(self, records, checked):
+        """Check or uncheck many folders as one change to the selection, however many views show them."""
+        if checked:
+            self.selection_changed([mic for mic in records if mic not in self.selected], [])
         else:
-            for mic in microphones:
-                model = mic[1]
-                pattern = mic[2]
-                position = mic[3]
-                config = mic[4]
-
-                model_item = self.find_or_create_child(parent_item, model, font)
-                pattern_item = self.find_or_create_child(model_item, pattern, font)
-                position_item = self.find_or_create_child(pattern_item, position, font)
-                self.find_or_create_child(position_item, config, font)
-
-
-    def add_pattern_sections(self):
-        # Clear the existing layout
-        for i in reversed(range(self.scroll_layout.count())):
-            widget = self.scroll_layout.itemAt(i).widget()
-            if widget is not None:
-                widget.deleteLater()
-            else:
-                self.scroll_layout.removeItem(self.scroll_layout.itemAt(i))
-
-        # Pattern section
-        self.pattern_tree = QTreeWidget()
-        self.pattern_tree.setHeaderHidden(True)
-        self.pattern_tree.itemChanged.connect(self.on_item_changed_pattern)
-        self.pattern_tree.setStyleSheet("""
-            QTreeWidget {
-                background-color: #DEE0F6;
-                border-radius: 10px;
-                margin-bottom: 20px;
-            }
-            QTreeWidget::item {
-                color: black;
-            }
-            QTreeWidget::item:selected {
-                background-color: #BBD2F5;
-            }
-        """)
-
-        pattern_font = QFont("Forma DJR Display", 20)
-
-        # Add items to the pattern section
-        self.add_pattern_items(pattern_font)
-
-        self.scroll_layout.addWidget(self.pattern_tree)
-
-    def add_pattern_items(self, font):
-        patterns = {}
-
-        # Combine hyperx_microphones and competitor_microphones
-        all_microphones = hyperx_microphones + competitor_microphones
-
-        for mic in all_microphones:
-            pattern = mic[2]
-            company = mic[0]
-            model = mic[1]
-            position = mic[3]
-            config = mic[4]
-
-            if pattern not in patterns:
-                patterns[pattern] = QTreeWidgetItem([pattern])
-                patterns[pattern].setFont(0, font)
-                patterns[pattern].setFlags(patterns[pattern].flags() | Qt.ItemIsUserCheckable)
-                patterns[pattern].setCheckState(0, Qt.Unchecked)
-                self.pattern_tree.addTopLevelItem(patterns[pattern])
-
-            pattern_item = patterns[pattern]
-            company_item = self.find_or_create_child(pattern_item, company, font)
-            model_item = self.find_or_create_child(company_item, model, font)
-            position_item = self.find_or_create_child(model_item, position, font)
-            self.find_or_create_child(position_item, config, font)
-
-    def add_effects_sections(self):
-        # Clear the existing layout
-        for i in reversed(range(self.scroll_layout.count())):
-            widget = self.scroll_layout.itemAt(i).widget()
-            if widget is not None:
-                widget.deleteLater()
-            else:
-                self.scroll_layout.removeItem(self.scroll_layout.itemAt(i))
-
-        # Effects section
-        self.effects_tree = QTreeWidget()
-        self.effects_tree.setHeaderHidden(True)
-        self.effects_tree.itemChanged.connect(self.on_item_changed_effects)
-        self.effects_tree.setStyleSheet("""
-            QTreeWidget {
-                background-color: #DEE0F6;
-                border-radius: 10px;
-                margin-bottom: 20px;
-            }
-            QTreeWidget::item {
-                color: black;
-            }
-            QTreeWidget::item:selected {
-                background-color: #BBD2F5;
-            }
-        """)
-
-        effects_font = QFont("Forma DJR Display", 20)
-
-        # Add items to the effects section
-        self.add_effects_items(effects_font)
-
-        self.scroll_layout.addWidget(self.effects_tree)
-
-    def add_effects_items(self, font):
-        effects = {}
-
-        # Combine hyperx_microphones and competitor_microphones
-        all_microphones = hyperx_microphones + competitor_microphones
-
-        for mic in all_microphones:
-            effect = mic[4]  # Assuming 'config' represents the effect
-            company = mic[0]
-            model = mic[1]
-            pattern = mic[2]
-            position = mic[3]
-
-            if effect not in effects:
-                effects[effect] = QTreeWidgetItem([effect])
-                effects[effect].setFont(0, font)
-                effects[effect].setFlags(effects[effect].flags() | Qt.ItemIsUserCheckable)
-                effects[effect].setCheckState(0, Qt.Unchecked)
-                self.effects_tree.addTopLevelItem(effects[effect])
-
-            effect_item = effects[effect]
-            company_item = self.find_or_create_child(effect_item, company, font)
-            model_item = self.find_or_create_child(company_item, model, font)
-            pattern_item = self.find_or_create_child(model_item, pattern, font)
-            self.find_or_create_child(pattern_item, position, font)
-
-    def find_or_create_child(self, parent, text, font):
-        for i in range(parent.childCount()):
-            child = parent.child(i)
-            if child.text(0) == text:
-                return child
-
-        new_child = QTreeWidgetItem([text])
-        new_child.setFont(0, font)
-        new_child.setForeground(0, QBrush(QColor("black")))  # Ensure the text color is black
-        new_child.setFlags(new_child.flags() | Qt.ItemIsUserCheckable)
-        new_child.setCheckState(0, Qt.Unchecked)
-        parent.addChild(new_child)
-        return new_child
-
-    def on_item_changed(self, item, column):
-        if column == 0:  # Ensure we are working with the first column where the checkbox is
-            state = item.checkState(column)
-            for i in range(item.childCount()):
-                child = item.child(i)
-                child.setCheckState(0, state)
-            self.update_checked_list()
-
-    def on_item_changed_pattern(self, item, column):
-        if column == 0:  # Ensure we are working with the first column where the checkbox is
-            state = item.checkState(column)
-            for i in range(item.childCount()):
-                child = item.child(i)
-                child.setCheckState(0, state)
-            self.update_checked_list_pattern()
-
-    def on_item_changed_effects(self, item, column):
-        if column == 0:  # Ensure we are working with the first column where the checkbox is
-            state = item.checkState(column)
-            for i in range(item.childCount()):
-                child = item.child(i)
-                child.setCheckState(0, state)
-            self.update_checked_list_effects()
-
-    def update_checked_list(self):
-        self.checked_list_widget.clear()
-        self.add_checked_items(self.hyperx_tree)
-        self.add_checked_items(self.competitor_tree, is_competitor=True)
-
-
-    def update_checked_list_pattern(self):
-        self.checked_list_widget.clear()
-        self.add_checked_items_pattern(self.pattern_tree)
-
-    def update_checked_list_effects(self):
-        self.checked_list_widget.clear()
-        self.add_checked_items_effects(self.effects_tree)
-
-    def add_checked_items(self, tree_widget, is_competitor=False):
-        if tree_widget:
-            root = tree_widget.invisibleRootItem()
-            stack = [root]
-            while stack:
-                parent = stack.pop()
-                for i in range(parent.childCount()):
-                    child = parent.child(i)
-                    if child.checkState(0) == Qt.Checked:
-                        full_path = self.get_full_path(child, is_competitor)
-                        if full_path:
-                            self.checked_list_widget.addItem(full_path)
-                    stack.append(child)
-
-
-
-
-    def add_checked_items_pattern(self, tree_widget):
-        if tree_widget:
-            root = tree_widget.invisibleRootItem()
-            stack = [root]
-            while stack:
-                parent = stack.pop()
-                for i in range(parent.childCount()):
-                    child = parent.child(i)
-                    if child.checkState(0) == Qt.Checked:
-                        full_path = self.get_full_path_pattern(child)
-                        if full_path:
-                            self.checked_list_widget.addItem(full_path)
-                    stack.append(child)
-
-
-    def add_checked_items_effects(self, tree_widget):
-        if tree_widget:
-            root = tree_widget.invisibleRootItem()
-            stack = [root]
-            while stack:
-                parent = stack.pop()
-                for i in range(parent.childCount()):
-                    child = parent.child(i)
-                    if child.checkState(0) == Qt.Checked:
-                        full_path = self.get_full_path_effects(child)
-                        if full_path:
-                            self.checked_list_widget.addItem(full_path)
-                    stack.append(child)
-
-
-    def get_full_path(self, item, is_competitor=False):
-        base_path = 'C:\\Users\\TaRi525\\Documents\\Hyper X Intern Project\\GeneratedFolders'
-        path = []
-        while item:
-            path.append(item.text(0))
-            item = item.parent()
-        if is_competitor:
-            path = path[:-1]  # Remove the "Competitors" part
-        path.reverse()
-        if len(path) == 5:  # Ensure the full path has all five components
-            folder_name = "_".join(path)
-            return os.path.join(base_path, folder_name)
-        return None
-
-    def get_full_path_pattern(self, item):
-        base_path = 'C:\\Users\\TaRi525\\Documents\\Hyper X Intern Project\\GeneratedFolders'
-        path = []
-        while item:
-            path.append(item.text(0))
-            item = item.parent()
-        path.reverse()
-        if len(path) == 5:  # Ensure the full path has all five components
-            # Reorder the components to Company > Product > Pattern > Position > Effect
-            reordered_path = [path[1], path[2], path[0], path[3], path[4]]
-            folder_name = "_".join(reordered_path)
-            return os.path.join(base_path, folder_name)
-        return None
-
-    def get_full_path_effects(self, item):
-        base_path = 'C:\\Users\\TaRi525\\Documents\\Hyper X Intern Project\\GeneratedFolders'
-        path = []
-        while item:
-            path.append(item.text(0))
-            item = item.parent()
-        path.reverse()
-        if len(path) == 5:  # Ensure the full path has all five components
-            # Reorder the components to Company > Product > Pattern > Position > Effect
-            reordered_path = [path[1], path[2], path[3], path[4], path[0]]
-            folder_name = "_".join(reordered_path)
-            return os.path.join(base_path, folder_name)
-        return None
-
-
+            self.selection_changed([], [mic for mic in records if mic in self.selected])
+        for _, tree in self.views[self.current_view][1]:
+            tree.model().set_checked_records(self.selected)
+        self.synced[self.current_view] = self.selection_version
+
+    def search(self, text):
+        if not text.strip():
+            self.search_results = []
+            self.results_list.hide()
+            self.check_results_button.hide()
+            self.scroll_area.show()
+            return
+        if self.search_index is None:
+            # Built on the first keystroke, then kept in step with the catalog
+            self.search_index = SearchIndex(mic for mic in self.catalog.records() if len(mic) >= 5)
+        self.search_results = self.search_index.search(text)
+        self.show_search_results()
+
+    def show_search_results(self):
+        self.results_list.blockSignals(True)
+        self.results_list.clear()
+        for mic in self.search_results[:MAX_RESULTS]:
+            item = QListWidgetItem(" ".join(mic))
+            item.setToolTip(self.folder_path(mic))
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if mic in self.selected else Qt.Unchecked)
+            self.results_list.addItem(item)
+        self.results_list.blockSignals(False)
+        self.check_results_button.setText(f"Check all {len(self.search_results)}")
+        self.check_results_button.setEnabled(bool(self.search_results))
+        self.scroll_area.hide()
+        self.results_list.show()
+        self.check_results_button.show()
+
+    def result_toggled(self, item):
+        mic = self.search_results[self.results_list.row(item)]
+        self.set_records_checked([mic], item.checkState() == Qt.Checked)
+
+    def check_search_results(self):
+        self.set_records_checked(self.search_results, True)
+        self.show_search_results()
 
     def handle_toggle(self, label_text):
-        self.checked_list_widget.clear()
-        if label_text == 'Product':
-            self.add_microphone_sections()
-            self.update_checked_list()
-        elif label_text == 'Pattern':
-            self.add_pattern_sections()
-            self.update_checked_list_pattern()
-        elif label_text == 'Effects':
-            self.add_effects_sections()
-            self.update_checked_list_effects()
+        if label_text in VIEW_SECTIONS:
+            self.show_view(label_text)
 
 
 if __name__ == "__main__":
@@ -1,27 +1,20 @@
-import os
 import sys
 from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QScrollArea, QFrame, QMenu, QAction, QHBoxLayout
 from PyQt5.QtCore import Qt, QPoint
 from ToggleButton import ToggleStack  # Import the ToggleStack class
 from functools import partial
+from WavIndex import wav_index
+from Catalog import shared_catalog, HYPERX_COMPANY
+from BackgroundTasks import TaskRelay, thread_pool
 
-# Reads in file names and establishes necessary lists
+# Folder of Company_Model_Pattern_Position_Recording.wav files
 path = 'C:\\Users\\TaRi525\\Documents\\Hyper X Intern Project\\Dummy Audio Files'
-try:
-    names = os.listdir(path)
-except Exception as e:
-    print(f"Error reading directory: {e}")
-    names = []
 
-info = [name.split('_') for name in names]
-hyperx_microphones = [thing for thing in info if thing[0] == "HyperX"]
-competitor_microphones = [thing for thing in info if thing[0] != "HyperX"]
-
-hyperx_microphones_displayed = []
-competitor_microphones_displayed = []
-
-hyperx_microphones.sort()
-competitor_microphones.sort()
+def recording_infos(paths):
+    # Runs on a pool thread, a stat per file is slow on a network share
+    infos = [wav_index().info(file_path, save=False) for file_path in paths]
+    wav_index().save()
+    return infos
 
 # Main window class
 class ScrollWindow(QWidget):
@@ -31,6 +24,12 @@ class ScrollWindow(QWidget):
         self.setWindowTitle("HyperX Microphone Comparisons")
         self.setGeometry(100, 100, 2000, 1600)
 
+        # File names are parsed once into an index shared with the other selection windows
+        self.catalog = shared_catalog(path, '.wav')
+        self.relay = TaskRelay(self)
+        self.relay.finished.connect(self.label_recordings)
+        self.relay.failed.connect(lambda tag, error: print(f"Error reading recording headers: {error}"))
+
         main_layout = QHBoxLayout()
         self.setLayout(main_layout)
 
@@ -120,30 +119,27 @@ class ScrollWindow(QWidget):
         hyperx_title.setStyleSheet("font-size: 20px; color: #717070;font-family: 'Forma DJR Display';")
         layout.addWidget(hyperx_title)
 
-        for mic in hyperx_microphones:
-            if mic[1] not in hyperx_microphones_displayed:
-                hyperx_microphones_displayed.append(mic[1])
-                button = QPushButton(mic[1])
-                button.setMinimumSize(400, 100)
-                button.setStyleSheet("font-size: 40px; font-family: 'Forma DJR Micro'; background-color: #DEE0F6; border-radius: 10px;")
+        for model in self.catalog.children(HYPERX_COMPANY):
+            button = QPushButton(model)
+            button.setMinimumSize(400, 100)
+            button.setStyleSheet("font-size: 40px; font-family: 'Forma DJR Micro'; background-color: #DEE0F6; border-radius: 10px;")
 
-                button.clicked.connect(partial(self.show_patterns_menu, button, mic[0], mic[1]))
-                
-                layout.addWidget(button)
+            button.clicked.connect(partial(self.show_patterns_menu, button, HYPERX_COMPANY, model))
+
+            layout.addWidget(button)
 
         competitor_title = QLabel("Competitors")
         competitor_title.setStyleSheet("font-size: 20px; color: #717070;font-family: 'Forma DJR Display';")
         layout.addWidget(competitor_title)
 
-        for mic in competitor_microphones:
-            if (mic[0] + " " + mic[1]) not in competitor_microphones_displayed:
-                competitor_microphones_displayed.append(mic[0] + " " + mic[1])
-                button = QPushButton(mic[0] + " " + mic[1])
+        for company in self.catalog.competitors():
+            for model in self.catalog.children(company):
+                button = QPushButton(company + " " + model)
                 button.setMinimumSize(400, 100)
                 button.setStyleSheet("font-size: 40px; font-family: 'Forma DJR Micro'; background-color: #F6DEDE; border-radius: 10px;")
 
-                button.clicked.connect(partial(self.show_patterns_menu, button, mic[0], mic[1]))
-                
+                button.clicked.connect(partial(self.show_patterns_menu, button, company, model))
+
                 layout.addWidget(button)
 
     def show_patterns_menu(self, button, company, model):
@@ -155,38 +151,30 @@ class ScrollWindow(QWidget):
         menu.popup(QPoint(offset.x() - 100, offset.y() - 5))
 
     def create_patterns_menu(self, menu, company, model):
-        if company == "HyperX":
-            patterns = list(set(item[2] for item in hyperx_microphones if item[0] == company and item[1] == model))
-        else:
-            patterns = list(set(item[2] for item in competitor_microphones if item[0] == company and item[1] == model))
-
-        patterns.sort()
-        for pattern in patterns:
+        # Each level is a lookup in the catalog, so building the menu only costs what it shows
+        recordings = []  # (action, recording, path) to label once the headers have been read
+        for pattern in self.catalog.children(company, model):
             positions_menu = QMenu(pattern, self)
             positions_menu.setStyleSheet(menu.styleSheet())
 
-            if company == "HyperX":
-                positions = list(set(item[3] for item in hyperx_microphones if item[0] == company and item[1] == model and item[2] == pattern))
-            else:
-                positions = list(set(item[3] for item in competitor_microphones if item[0] == company and item[1] == model and item[2] == pattern))
-
-            positions.sort()
-            for position in positions:
+            for position in self.catalog.children(company, model, pattern):
                 recordings_menu = QMenu(position, self)
                 recordings_menu.setStyleSheet(menu.styleSheet())
 
-                if company == "HyperX":
-                    recordings = list(set(item[4][:-4] for item in hyperx_microphones if item[0] == company and item[1] == model and item[2] == pattern and item[3] == position))
-                else:
-                    recordings = list(set(item[4][:-4] for item in competitor_microphones if item[0] == company and item[1] == model and item[2] == pattern and item[3] == position))
-
-                recordings.sort()
-                for recording in recordings:
+                for recording in self.catalog.children(company, model, pattern, position):
                     action = QAction(recording, self)
                     recordings_menu.addAction(action)
                     action.triggered.connect(partial(self.display_selection, company, model, pattern, position, recording))
+                    recordings.append((action, recording, self.catalog.path(company, model, pattern, position, recording)))
                 positions_menu.addMenu(recordings_menu)
             menu.addMenu(positions_menu)
+        # Durations and validity come from the header index, read off the GUI thread so the menu opens at once
+        self.relay.submit(recordings, thread_pool(), recording_infos, [file_path for _, _, file_path in recordings])
+
+    def label_recordings(self, recordings, infos):
+        for (action, recording, _), info in zip(recordings, infos):
+            action.setText(f"{recording} ({info['duration']:.1f} s)" if info['valid'] else f"{recording} (unreadable)")
+            action.setEnabled(info['valid'])
 
     def display_selection(self, company, model, pattern, position, recording):
         selection_text = f"Selected: {company} {model} {pattern} {position} {recording}"
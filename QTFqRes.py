@@ -12,6 +12,7 @@ from matplotlib.font_manager import FontProperties
 import re
 import logging
 from SmoothnessToggle import SliderStack
+from PinkNoiseResponse import ResponseAnalyzer
 
 
 
@@ -19,6 +20,7 @@ logging.basicConfig(level=logging.INFO)
 
 FONT_FAMILY = 'Forma DJR Micro'
 FONT_SIZE = 10
+TEMPORARY_CURVE_POINTS = 400
 
 def smooth_spectrum(X, f, Noct):
     assert np.isscalar(Noct) and Noct >= 0, 'NOCT must be a non-negative scalar.'
@@ -99,6 +101,9 @@ class CSVGrapher(QMainWindow):
         self.initial_xmax = 20000
         self.Noct = 12  # Default smoothing factor
 
+        # Estimates responses from pink-noise recordings for folders without an FRQ.csv
+        self.response_analyzer = ResponseAnalyzer(self)
+        self.response_analyzer.analyzed.connect(self.load_response)
 
 
         self.setup_ui()
@@ -109,6 +114,8 @@ class CSVGrapher(QMainWindow):
         self.lines = []
         self.original_linewidths = []
         self.highlighted_lines = set()  # To keep track of the currently highlighted lines
+        self.temporary_curve = None  # (name, freqs, dB) of the live loop-region spectrum
+        self.temporary_line = None
         self.update_button_states()
         self.init_plot()
 
@@ -240,6 +247,17 @@ class CSVGrapher(QMainWindow):
         df[df.columns[1]] = pd.to_numeric(df[df.columns[1]], errors='coerce')
         df.dropna(subset=[df.columns[0], df.columns[1]], inplace=True)
 
+        self.add_dataframe(df, folder_name)
+
+    def load_pink_noise(self, file_path, folder_name):
+        # The curve is added asynchronously once the background estimate (or its cache entry) is ready
+        self.response_analyzer.request(file_path, folder_name)
+
+    def load_response(self, folder_name, freqs, magnitudes):
+        df = pd.DataFrame({'Frequency (Hz)': freqs, 'dB': magnitudes})
+        self.add_dataframe(df, folder_name)
+
+    def add_dataframe(self, df, folder_name):
         # Downsample the data to 2000 points using log scale
         df = self.downsample_data(df, 2000)
 
@@ -326,8 +344,33 @@ class CSVGrapher(QMainWindow):
         except ValueError:
             return None
 
+    def show_temporary_curve(self, name, freqs, magnitudes):
+        # Thin to the same log grid as the loaded curves so smoothing stays cheap while dragging
+        if len(freqs) > TEMPORARY_CURVE_POINTS:
+            grid = np.geomspace(freqs[0], freqs[-1], TEMPORARY_CURVE_POINTS)
+            magnitudes = np.interp(grid, freqs, magnitudes)
+            freqs = grid
+        magnitudes = smooth_spectrum(magnitudes, freqs, self.Noct)
+        x_value = self.parse_input(self.normalize_button.input.text())
+        if x_value is not None:
+            magnitudes = magnitudes - np.interp(x_value, freqs, magnitudes)
+        self.temporary_curve = (name, freqs, magnitudes)
+
+        if self.temporary_line is not None and self.temporary_line.axes is not None:
+            # Only the overlay changes, so skip rebuilding the figure
+            self.temporary_line.set_data(freqs, magnitudes)
+            self.temporary_line.set_label(name)
+            self.canvas.draw_idle()
+        else:
+            self.update_plot()
+
+    def clear_temporary_curve(self):
+        if self.temporary_curve is not None:
+            self.temporary_curve = None
+            self.update_plot()
+
     def update_plot(self, initial=False):
-        if not self.dataframes:
+        if not self.dataframes and self.temporary_curve is None:
             return
 
         self.figure.clear()
@@ -340,6 +383,11 @@ class CSVGrapher(QMainWindow):
             self.lines.append(line)
             self.original_linewidths.append(line.get_linewidth())
 
+        self.temporary_line = None
+        if self.temporary_curve is not None:
+            name, freqs, magnitudes = self.temporary_curve
+            self.temporary_line, = ax.plot(freqs, magnitudes, label=name, color='black', linestyle='--')
+
         # Set the axis labels to 'Hz' and 'dB'
         ax.set_xlabel('Hz', fontsize=10, family=FONT_FAMILY)
         ax.set_ylabel('dB', fontsize=10, family=FONT_FAMILY)
@@ -1,26 +1,88 @@
 import sys
 import os
-import librosa
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QTreeWidget, QTreeWidgetItem, QHBoxLayout, QMessageBox, QMainWindow
-from PyQt5.QtCore import Qt, QTimer, QUrl, pyqtSignal
-from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QTreeWidget, QTreeWidgetItem, QHBoxLayout, QMessageBox, QMainWindow, QStackedWidget, QFileDialog
+from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont
-from matplotlib.font_manager import FontProperties
-import scipy.signal
 import time
 from matplotlib.patches import FancyBboxPatch
-
-# Define font constants
-FONT_FAMILY = 'Forma DJR Micro'
-FONT_SIZE = 10
-MATPLOTLIB_FONT = FontProperties(family=FONT_FAMILY, size=FONT_SIZE)
+from matplotlib.transforms import Affine2D
+from PlaybackEngine import PlaybackEngine
+from Loudness import LoudnessAnalyzer, gain_for, SILENCE_DB
+from AudioStore import AudioStore, DEFAULT_MEMORY_BUDGET
+from Spectrogram import SpectrogramCanvas
+from LoopSpectrum import FrameSpectra
+from Alignment import Aligner
+from Resampler import Resampler
+from NullTest import null_test, format_summary
+from BackgroundTasks import TaskRelay, thread_pool
+from AudioStats import StatsWindow
+from ClipExport import clip_name, export_clips
+from RTA import BandAnalyzer, RTAWindow
+from Fonts import FONT_FAMILY, FONT_SIZE, MATPLOTLIB_FONT
+
+DIFFERENCE_FOLDER = "Differences"
+
+
+ENVELOPE_BINS = 2048  # Columns per waveform, about the canvas width in pixels
+ENVELOPE_CHUNK_BINS = 256  # Bins reduced per step, bounds the mid/side temporaries
+CHANNEL_MODES = ['Overlay', 'Stacked', 'Mid/Side']
+CHANNEL_COLORS = ['#005fb8', '#ff83ff', '#4659f5', '#aa9ef9', '#717070', '#f4bfbf']
+
+
+def lane_envelopes(read, lanes, frames, bins=ENVELOPE_BINS):
+    """Min/max of each lane over equal bins of frames.
+
+    `read(start, stop)` returns a (lanes, stop - start) block. Each block is
+    reshaped into (lanes, bins, frames per bin) as a strided view and reduced
+    in place, so channel data is never copied or interleaved.
+    """
+    per = max(1, -(-frames // bins))
+    count = -(-frames // per)
+    lows = np.empty((lanes, count), dtype=np.float32)
+    highs = np.empty((lanes, count), dtype=np.float32)
+    step = ENVELOPE_CHUNK_BINS * per
+    for start in range(0, frames, step):
+        block = read(start, min(frames, start + step))
+        first = start // per
+        whole = block.shape[-1] // per
+        if whole:
+            view = block[:, :whole * per].reshape(lanes, whole, per)
+            np.min(view, axis=-1, out=lows[:, first:first + whole])
+            np.max(view, axis=-1, out=highs[:, first:first + whole])
+        if whole * per < block.shape[-1]:  # Partial bin at the end of the recording
+            tail = block[:, whole * per:]
+            lows[:, first + whole] = tail.min(axis=-1)
+            highs[:, first + whole] = tail.max(axis=-1)
+    return lows, highs, per
+
+
+def channel_envelopes(y):
+    y = np.atleast_2d(y)
+    return lane_envelopes(lambda start, stop: y[:, start:stop], y.shape[0], y.shape[-1])
+
+
+def mid_side_envelopes(y):
+    # Mid and side only ever exist one chunk at a time
+    left, right = y[0], y[1]
+    return lane_envelopes(lambda start, stop: np.stack(((left[start:stop] + right[start:stop]) * 0.5,
+                                                        (left[start:stop] - right[start:stop]) * 0.5)),
+                          2, y.shape[-1])
+
+
+def channel_names(channels):
+    if channels == 1:
+        return ['Mono']
+    if channels == 2:
+        return ['L', 'R']
+    return [f"Ch {index + 1}" for index in range(channels)]
 
 
 class WaveformCanvas(FigureCanvas):
     loop_points_changed = pyqtSignal(float, float)
+    loop_region_dragged = pyqtSignal(float, float)  # Emitted continuously while a loop is being dragged
 
     def __init__(self, music_player, parent=None):
         self.fig, self.ax = plt.subplots()
@@ -28,6 +90,12 @@ class WaveformCanvas(FigureCanvas):
         super().__init__(self.fig)
         self.setParent(parent)
         self.current_line = None
+        self.waveform_artists = []  # One filled envelope per lane
+        self.lane_centers = []
+        self.plot_cache = {}  # (key, 'channels' or 'mid/side') -> (times, lows, highs, lane names)
+        self.channel_mode = CHANNEL_MODES[0]
+        self.display_gain = 1.0
+        self.display_offset = 0.0
         self.music_player = music_player
         self.loop_start = 0.0  # Initialize to 0
         self.loop_end = 0.0  # Initialize to 0
@@ -40,20 +108,87 @@ class WaveformCanvas(FigureCanvas):
         self.ax.clear()
         self.ax.axis('off')  # Turn off the axes
 
-    def plot_waveform(self, y, sr, title=""):
-        self.ax.clear()
-        self.ax.plot(np.linspace(0, len(y) / sr, num=len(y)), y, color='#005fb8')  # Change color to black
-        self.ax.set_xlim(0, len(y) / sr)  # Ensure the x-axis starts at 0
-        self.ax.set_ylim(-1, 1)  # Set the y-axis limits to -1 to 1
-        self.ax.set_xlabel('Time (s)', fontproperties=MATPLOTLIB_FONT)
-        self.ax.set_ylabel('Amplitude', fontproperties=MATPLOTLIB_FONT)
+    def plot_data(self, y, sr, key=None):
+        y = np.atleast_2d(y)
+        mid_side = self.channel_mode == 'Mid/Side' and y.shape[0] >= 2
+        cache_key = (key, 'mid/side' if mid_side else 'channels')
+        if key is not None and cache_key in self.plot_cache:
+            return self.plot_cache[cache_key]
+        if mid_side:
+            lows, highs, per = mid_side_envelopes(y)
+            names = ['Mid', 'Side']
+        else:
+            lows, highs, per = channel_envelopes(y)
+            names = channel_names(y.shape[0])
+        times = (np.arange(lows.shape[1]) + 0.5) * per / sr
+        data = (times, lows, highs, names)
+        if key is not None:
+            self.plot_cache[cache_key] = data  # Envelopes are small copies, safe to keep after a buffer is evicted
+        return data
+
+    def plot_waveform(self, y, sr, title="", key=None, offset=0.0):
+        times, lows, highs, names = self.plot_data(y, sr, key)
+        if self.current_line is None:
+            # Build the axes once, later waveforms only swap the envelopes
+            self.ax.clear()
+            self.selection_patch = None
+            self.ax.set_xlabel('Time (s)', fontproperties=MATPLOTLIB_FONT)
+            self.current_line = self.ax.axvline(0, color='k')  # Add a vertical line at the beginning
+        for artist in self.waveform_artists:
+            artist.remove()
+
+        stacked = self.channel_mode != 'Overlay' and len(names) > 1
+        self.lane_centers = [-2.0 * lane for lane in range(len(names))] if stacked else [0.0] * len(names)
+        self.waveform_artists = [
+            self.ax.fill_between(times, lows[lane], highs[lane], color=CHANNEL_COLORS[lane % len(CHANNEL_COLORS)],
+                                 alpha=1.0 if stacked or len(names) == 1 else 0.6, linewidth=0, label=names[lane])
+            for lane in range(len(names))]
+        if stacked:
+            self.ax.set_ylim(-2 * len(names) + 1, 1)
+            self.ax.set_yticks(self.lane_centers)
+            self.ax.set_yticklabels(names)
+            self.ax.set_ylabel('Channel', fontproperties=MATPLOTLIB_FONT)
+        else:
+            self.ax.set_ylim(-1, 1)  # Set the y-axis limits to -1 to 1
+            self.ax.set_yticks([-1, -0.5, 0, 0.5, 1])
+            self.ax.set_ylabel('Amplitude', fontproperties=MATPLOTLIB_FONT)
+
+        self.display_offset = offset
+        self.apply_transforms()
+        frames = np.atleast_2d(y).shape[-1]
+        self.ax.set_xlim(-offset, frames / sr - offset)  # The x-axis starts where this recording starts
         self.ax.set_title(title, fontproperties=MATPLOTLIB_FONT)
         for label in self.ax.get_xticklabels() + self.ax.get_yticklabels():
             label.set_fontproperties(MATPLOTLIB_FONT)
-        self.current_line = self.ax.axvline(0, color='k')  # Add a vertical line at the beginning
-        self.draw()
         self.update_selection_patch()  # Update the selection patch if loop points are set
 
+    def apply_transforms(self):
+        # Gain, alignment offset and lane position are applied by transforms, the cached envelopes stay untouched
+        for artist, center in zip(self.waveform_artists, self.lane_centers):
+            transform = Affine2D().scale(1, self.display_gain).translate(-self.display_offset, center)
+            artist.set_transform(transform + self.ax.transData)
+
+    def set_display_gain(self, gain):
+        # Scale the drawing rather than the samples, so the plot shows the level that is heard
+        self.display_gain = gain
+        self.apply_transforms()
+        self.draw_idle()
+
+    def set_channel_mode(self, mode):
+        self.channel_mode = mode
+
+    def discard(self, key):
+        for cache_key in [cache_key for cache_key in self.plot_cache if cache_key[0] == key]:
+            del self.plot_cache[cache_key]
+
+    def clear_waveform(self):
+        self.ax.clear()
+        self.waveform_artists = []
+        self.lane_centers = []
+        self.current_line = None
+        self.selection_patch = None
+        self.plot_cache.clear()
+
 
     def on_click(self, event):
         if event.inaxes == self.ax:
@@ -78,6 +213,7 @@ class WaveformCanvas(FigureCanvas):
             if modifiers == Qt.ControlModifier:  # Only drag if Control is pressed
                 self.loop_end = event.xdata
                 self.update_selection_patch()
+                self.loop_region_dragged.emit(min(self.loop_start, self.loop_end), max(self.loop_start, self.loop_end))
 
 
     def on_release(self, event):
@@ -111,8 +247,7 @@ class WaveformCanvas(FigureCanvas):
 
 
     def reset_loop_points(self):
-        self.loop_start = 0
-        self.loop_end = self.ax.get_xlim()[1]
+        self.loop_start, self.loop_end = self.ax.get_xlim()
         self.update_selection_patch()
         self.loop_points_changed.emit(self.loop_start, self.loop_end)
 
@@ -123,7 +258,10 @@ class WaveformCanvas(FigureCanvas):
 
 
 class MusicPlayer(QWidget):
-    def __init__(self, parent=None):
+    loopSpectrumChanged = pyqtSignal(str, object, object)  # name, frequencies, averaged spectrum in dB
+    loopSpectrumCleared = pyqtSignal()
+
+    def __init__(self, parent=None, memory_budget=DEFAULT_MEMORY_BUDGET):
         super().__init__(parent)
         self.setStyleSheet("""
             QWidget {
@@ -131,13 +269,44 @@ class MusicPlayer(QWidget):
                 border-radius: 15px;
             }
         """)
-        self.mediaPlayer = QMediaPlayer()
-        self.mediaPlayer.positionChanged.connect(self.update_time)
-        self.mediaPlayer.stateChanged.connect(self.update_button_text)
-        self.mediaPlayer.stateChanged.connect(self.check_loop)
+        self.engine = PlaybackEngine(self)
+        self.engine.positionChanged.connect(self.update_time)
+        self.engine.stateChanged.connect(self.update_button_text)
 
         self.waveformCanvas = WaveformCanvas(self, self)
+        self.spectrogramCanvas = SpectrogramCanvas(self, self)
+
+        # The waveform and spectrogram share one slot, the Spectrogram button flips between them
+        self.viewStack = QStackedWidget()
+        self.viewStack.addWidget(self.waveformCanvas)
+        self.viewStack.addWidget(self.spectrogramCanvas)
         self.waveformCanvas.loop_points_changed.connect(self.set_loop_points)
+        self.waveformCanvas.loop_region_dragged.connect(self.update_loop_spectrum)
+        self.frame_spectra = None  # Per-frame spectra of the current source, reused while dragging
+        self.frame_spectra_cache = {}  # unique_key -> FrameSpectra, blocks already analysed survive a toggle
+        # Blocks a loop edge reaches for the first time are computed on the pool, the curve fills in as they arrive
+        self.loop_block_relay = TaskRelay(self)
+        self.loop_block_relay.finished.connect(self.loop_block_ready)
+        self.loop_block_relay.failed.connect(self.loop_block_failed)
+
+        # Takes of the same phrase are aligned to the first one loaded, so toggles land on the same syllable
+        self.aligner = Aligner(self)
+        self.aligner.aligned.connect(self.apply_offset)
+        self.alignment_references = {}  # recording type -> unique key of the reference take
+
+        # Every recording is loaded at one session rate, so switching never reopens the audio sink
+        self.resampler = Resampler()
+
+        # Difference renders are computed off the GUI thread and added to the tree like any recording
+        self.difference_relay = TaskRelay(self)
+        self.difference_relay.finished.connect(self.add_difference)
+        self.difference_relay.failed.connect(lambda tag, error: QMessageBox.critical(self, "Error", f"Difference failed: {error}"))
+
+        # Third-octave levels of whole recordings, computed once so the analyzer only looks up a frame per tick
+        self.band_analyzer = BandAnalyzer(self)
+        self.band_analyzer.analyzed.connect(self.store_band_levels)
+        self.band_levels = {}  # unique key -> (levels, seconds per frame), or None while being analyzed
+        self.rta_window = None
 
         font = QFont(FONT_FAMILY, FONT_SIZE)
 
@@ -234,10 +403,6 @@ class MusicPlayer(QWidget):
         """)
 
 
-        self.timer = QTimer(self)
-        self.timer.setInterval(10)  # Update every 20 milliseconds
-        self.timer.timeout.connect(self.update_time)
-
         buttonLayout = QVBoxLayout()
 
         # Horizontal layout for Play and Toggle buttons
@@ -312,26 +477,101 @@ class MusicPlayer(QWidget):
         select_all_button = QPushButton("Select All")
         clear_all_button = QPushButton("Clear All")
 
+        # Opens a sortable table of level statistics for every loaded file
+        statistics_button = QPushButton("Statistics")
+        self.stats_window = None
+
         # Add the Select All and Clear All buttons to the horizontal layout
         select_clear_hbox_layout.addWidget(select_all_button)
         select_clear_hbox_layout.addWidget(clear_all_button)
+        select_clear_hbox_layout.addWidget(statistics_button)
 
         # Add the horizontal layout to the button layout
         buttonLayout.addLayout(select_clear_hbox_layout)
 
+        # Loudness matching levels every source to the quietest one so A/B comparisons are fair
+        self.match_loudness_button = QPushButton("Match Loudness")
+        self.match_loudness_button.setCheckable(True)
+        self.match_loudness_button.setFont(QFont(FONT_FAMILY, FONT_SIZE))
+        self.match_loudness_button.setStyleSheet("""
+            QPushButton {
+                background-color: black;
+                color: white;
+                border-radius: 5px; font-size: 25px;
+            }
+            QPushButton:checked {
+                background-color: #4659f5;
+            }
+        """)
+        self.match_loudness_button.toggled.connect(self.update_gain_matching)
+
+        self.spectrogram_button = QPushButton("Spectrogram")
+        self.spectrogram_button.setCheckable(True)
+        self.spectrogram_button.setFont(QFont(FONT_FAMILY, FONT_SIZE))
+        self.spectrogram_button.setStyleSheet(self.match_loudness_button.styleSheet())
+        self.spectrogram_button.toggled.connect(self.set_spectrogram_mode)
+
+        # Aligned, gain-matched subtraction of the two checked recordings
+        self.difference_button = QPushButton("Difference")
+        self.difference_button.setFont(QFont(FONT_FAMILY, FONT_SIZE))
+        self.difference_button.setStyleSheet("""
+            QPushButton {
+                background-color: black;
+                color: white;
+                border-radius: 5px; font-size: 25px;
+            }
+            QPushButton:pressed {
+                background-color: gray;
+            }
+        """)
+        self.difference_button.clicked.connect(self.compute_difference)
+
+        view_hbox_layout = QHBoxLayout()
+        view_hbox_layout.addWidget(self.match_loudness_button)
+        view_hbox_layout.addWidget(self.spectrogram_button)
+        view_hbox_layout.addWidget(self.difference_button)
+        buttonLayout.addLayout(view_hbox_layout)
+
+        # Cycles the waveform between overlaid channels, stacked lanes and mid/side lanes
+        self.channel_mode_button = QPushButton(f"Channels: {CHANNEL_MODES[0]}")
+        self.channel_mode_button.setFont(QFont(FONT_FAMILY, FONT_SIZE))
+        self.channel_mode_button.setStyleSheet(self.difference_button.styleSheet())
+        self.channel_mode_button.clicked.connect(self.cycle_channel_mode)
+
+        # Writes the loop region of every checked recording to its own WAV clip
+        self.export_button = QPushButton("Export Loop")
+        self.export_button.setFont(QFont(FONT_FAMILY, FONT_SIZE))
+        self.export_button.setStyleSheet(self.difference_button.styleSheet())
+        self.export_button.clicked.connect(self.export_loop)
+
+        # Shows a third-octave analyzer that follows the playhead
+        self.rta_button = QPushButton("RTA")
+        self.rta_button.setCheckable(True)
+        self.rta_button.setFont(QFont(FONT_FAMILY, FONT_SIZE))
+        self.rta_button.setStyleSheet(self.match_loudness_button.styleSheet())
+        self.rta_button.toggled.connect(self.set_rta_visible)
+
+        channel_export_hbox_layout = QHBoxLayout()
+        channel_export_hbox_layout.addWidget(self.channel_mode_button)
+        channel_export_hbox_layout.addWidget(self.export_button)
+        channel_export_hbox_layout.addWidget(self.rta_button)
+        buttonLayout.addLayout(channel_export_hbox_layout)
+
         buttonContainer = QWidget()
         buttonContainer.setLayout(buttonLayout)
         buttonContainer.setFixedWidth(400)  # Set the fixed width for the button panel
 
         mainLayout = QHBoxLayout()
-        mainLayout.addWidget(self.waveformCanvas, 4)  # Increase the ratio for the waveform canvas
+        mainLayout.addWidget(self.viewStack, 4)  # Increase the ratio for the waveform canvas
         mainLayout.addWidget(buttonContainer, 1)
 
         self.setLayout(mainLayout)
 
         self.audio_duration = 0
-        self.current_waveform = 0
-        self.waveform_data = []
+        self.current_key = None
+        # Decoded audio by unique key, least recently played buffers spill to memory maps
+        self.audio_store = AudioStore(memory_budget, on_evict=self.buffer_evicted)
+        self.tree_items = {}  # unique key -> leaf QTreeWidgetItem
         self.playback_position = 0
         self.is_playing = False
         self.loop_start = 0
@@ -339,14 +579,20 @@ class MusicPlayer(QWidget):
         
         # Add this dictionary to store displayed names and file paths
         self.file_path_dict = {}
+
+        # Loudness measurements per file path, filled in by the background analyzer
+        self.loudness_values = {}
+        self.loudness = LoudnessAnalyzer(self)
+        self.loudness.analyzed.connect(self.apply_loudness)
         
         pink_noise_button.clicked.connect(self.filter_pink_noise)
         female_button.clicked.connect(self.filter_female)
         male_button.clicked.connect(self.filter_male)
         select_all_button.clicked.connect(self.select_all)
         clear_all_button.clicked.connect(self.clear_all)
+        statistics_button.clicked.connect(self.show_statistics)
         self.current_file_type = None
-        for button in [select_all_button, clear_all_button]:
+        for button in [select_all_button, clear_all_button, statistics_button]:
             button.setFont(QFont(FONT_FAMILY, FONT_SIZE))
             button.setStyleSheet("""
                 QPushButton {
@@ -393,8 +639,10 @@ class MusicPlayer(QWidget):
             folder_item = QTreeWidgetItem([display_folder_name])
             self.fileTreeWidget.addTopLevelItem(folder_item)
 
-            for file_path in file_paths:
-                y, sr = librosa.load(file_path, sr=None, mono=False)  # Ensure original sample rate and stereo
+            # Decoded in parallel, converted to the session rate where needed, stereo kept
+            loaded = self.resampler.load(file_paths)
+            sr = self.resampler.rate
+            for file_path, y in zip(file_paths, loaded):
                 file_name = os.path.basename(file_path)
 
                 # Determine the display name with unique identifier
@@ -416,14 +664,28 @@ class MusicPlayer(QWidget):
                 unique_key = f"{display_folder_name}_{display_name}"
                 self.file_path_dict[unique_key] = file_path
 
-                self.waveform_data.append((y, sr, unique_key))
+                self.tree_items[unique_key] = waveform_item
+                self.audio_store.add(unique_key, file_path, y, sr)
+                self.engine.add_source(unique_key, y, sr)
+                self.loudness.request(file_path)
+
+                recording_type = display_name.split(' - ')[-1]
+                reference_key = self.alignment_references.setdefault(recording_type, unique_key)
+                if reference_key != unique_key:
+                    self.aligner.request(unique_key, self.file_path_dict[reference_key], file_path)
+
+            if self.stats_window is not None and self.stats_window.isVisible():
+                self.stats_window.set_files(self.loaded_files())
+            if self.rta_button.isChecked():
+                self.request_band_levels()
 
             self.playButton.setEnabled(True)
             # Plot the first waveform and set it as the current media
-            if self.waveform_data:
-                y, sr, unique_key = self.waveform_data[0]
+            if folder_item.childCount() > 0:
                 display_name = folder_item.child(0).text(0)
-                self.waveformCanvas.plot_waveform(y, sr, title=f"{display_folder_name} - {display_name}")  # Use display name for the title
+                unique_key = f"{display_folder_name}_{display_name}"
+                entry = self.audio_store.get(unique_key)
+                self.waveformCanvas.plot_waveform(entry.data, entry.sr, title=f"{display_folder_name} - {display_name}", key=unique_key)  # Use display name for the title
 
             # Load the first file in the tree
             self.load_first_file()
@@ -459,18 +721,13 @@ class MusicPlayer(QWidget):
 
 
 
-    def load_and_adjust_waveform(self, y, sr, file_path, display_name, display_folder_name):
-        duration = librosa.get_duration(y=y, sr=sr)
-
+    def load_and_adjust_waveform(self, y, sr, unique_key, display_name, display_folder_name):
         # Update the title to use the display folder name and display name
-        self.waveformCanvas.plot_waveform(y, sr, title=f"{display_folder_name} - {display_name}")
-
-        # Set the new media
-        self.set_media(file_path)
+        self.waveformCanvas.plot_waveform(y, sr, title=f"{display_folder_name} - {display_name}", key=unique_key,
+                                          offset=self.engine.offset(unique_key))
 
-        # Maintain the play/pause status
-        if not self.is_playing:
-            self.mediaPlayer.pause()
+        # Switch the engine to the preloaded source
+        self.set_media(unique_key)
 
         # Reapply loop points (now using selection patch)
         self.waveformCanvas.loop_start = self.loop_start
@@ -478,19 +735,198 @@ class MusicPlayer(QWidget):
         self.waveformCanvas.update_selection_patch()
 
 
-    def set_media(self, file_path):
-        self.mediaPlayer.setMedia(QMediaContent(QUrl.fromLocalFile(file_path)))
-        self.mediaPlayer.setPosition(self.playback_position)
+    def set_media(self, unique_key):
+        # A pointer swap inside the engine, the play state and sample position carry over
+        self.engine.select(unique_key)
+        self.engine.set_loop(min(self.loop_start, self.loop_end), max(self.loop_start, self.loop_end))
+        self.frame_spectra = self.frame_spectra_cache.get(unique_key)
+        if self.frame_spectra is None:
+            self.frame_spectra = self.frame_spectra_cache[unique_key] = FrameSpectra(self.audio_store.get(unique_key))
+        self.waveformCanvas.set_display_gain(self.engine.gains.get(unique_key, 1.0))
+        if self.viewStack.currentWidget() is self.spectrogramCanvas:
+            self.show_spectrogram()
         self.highlight_current_file()
-        # Explicitly set the player to stop
-        self.mediaPlayer.stop()
-
-
 
+    def set_spectrogram_mode(self, enabled):
+        if enabled:
+            self.viewStack.setCurrentWidget(self.spectrogramCanvas)
+            self.show_spectrogram()
+        else:
+            self.viewStack.setCurrentWidget(self.waveformCanvas)
+
+    def show_spectrogram(self):
+        entry = self.audio_store.get(self.current_key)
+        if entry is not None:
+            self.spectrogramCanvas.set_source(self.current_key, entry, title=self.waveformCanvas.ax.get_title(),
+                                              offset=self.engine.offset(self.current_key))
+
+    def apply_offset(self, unique_key, offset):
+        self.engine.set_offset(unique_key, offset)
+        if unique_key == self.current_key:
+            # Redraw the current recording on the shifted timeline
+            entry = self.audio_store.get(unique_key)
+            self.waveformCanvas.plot_waveform(self.audio_store.samples(unique_key), entry.sr,
+                                              title=self.waveformCanvas.ax.get_title(), key=unique_key, offset=offset)
+            if self.viewStack.currentWidget() is self.spectrogramCanvas:
+                self.show_spectrogram()
+            self.update_time()
+
+    def apply_loudness(self, file_path, result):
+        self.loudness_values[file_path] = result
+        self.update_gain_matching()
+
+    def update_gain_matching(self):
+        matching = self.match_loudness_button.isChecked()
+        # Silent or fully gated files measure SILENCE_DB, they keep unity gain rather than setting the target
+        measured = {key: self.loudness_values[path]['lufs'] for key, path in self.file_path_dict.items()
+                    if path in self.loudness_values and self.loudness_values[path]['lufs'] > SILENCE_DB}
+        # Match down to the quietest source so no source is pushed into clipping
+        target = min(measured.values()) if measured else 0.0
+        for key in self.file_path_dict:
+            gain = gain_for(measured[key], target) if matching and key in measured else 1.0
+            self.engine.set_gain(key, gain)
+        if self.engine.current_key is not None:
+            self.waveformCanvas.set_display_gain(self.engine.gains.get(self.engine.current_key, 1.0))
+
+
+
+
+
+    def cycle_channel_mode(self):
+        mode = CHANNEL_MODES[(CHANNEL_MODES.index(self.waveformCanvas.channel_mode) + 1) % len(CHANNEL_MODES)]
+        self.channel_mode_button.setText(f"Channels: {mode}")
+        self.waveformCanvas.set_channel_mode(mode)
+        entry = self.audio_store.get(self.current_key)
+        if entry is not None:
+            self.waveformCanvas.plot_waveform(entry.data, entry.sr, title=self.waveformCanvas.ax.get_title(),
+                                              key=self.current_key, offset=self.engine.offset(self.current_key))
+
+    def export_loop(self):
+        checked = [item for item in self.flatten_tree(selected_only=True) if item.childCount() == 0]
+        keys = [f"{item.parent().text(0)}_{item.text(0)}" for item in checked]
+        keys = [key for key in keys if key in self.file_path_dict]  # Derived audio has no source file to slice
+        if not keys:
+            QMessageBox.warning(self, "Warning", "Check the recordings to export.")
+            return
+        folder = QFileDialog.getExistingDirectory(self, "Export Loop To")
+        if not folder:
+            return
 
+        start, end = min(self.loop_start, self.loop_end), max(self.loop_start, self.loop_end)
+        jobs = []
+        for key in keys:
+            offset = self.engine.offset(key)
+            entry = self.audio_store.get(key)
+            first, last = (start, end) if end > start else (-offset, entry.duration - offset)  # No loop exports the whole take
+            # The region is on the aligned timeline, each take is sliced at its own offset
+            jobs.append((self.file_path_dict[key], first + offset, last + offset,
+                         os.path.join(folder, clip_name(self.tree_items[key].text(0), first, last))))
+        written, failed = export_clips(jobs)
+        if failed:
+            QMessageBox.critical(self, "Error", "Some clips could not be exported:\n" + "\n".join(failed))
+        QMessageBox.information(self, "Export Loop", f"Exported {len(written)} clips to {folder}")
+
+    def loaded_files(self):
+        # (display name, file path) of every recording in the tree, derived audio has no file
+        return [(item.text(0), self.file_path_dict[key]) for key, item in self.tree_items.items()
+                if key in self.file_path_dict]
+
+    def show_statistics(self):
+        if self.stats_window is None:
+            self.stats_window = StatsWindow()
+        self.stats_window.set_files(self.loaded_files())
+        self.stats_window.show()
+        self.stats_window.raise_()
+
+    def set_rta_visible(self, visible):
+        if self.rta_window is None:
+            self.rta_window = RTAWindow()
+            self.rta_window.closed.connect(lambda: self.rta_button.setChecked(False))
+        if visible:
+            self.request_band_levels()
+            self.rta_window.show()
+            self.rta_window.raise_()
+            self.update_rta()
+        else:
+            self.rta_window.hide()
+
+    def request_band_levels(self):
+        for key in self.tree_items:
+            if key not in self.band_levels:
+                self.band_levels[key] = None
+                self.band_analyzer.request(key, self.file_path_dict.get(key), self.audio_store.get(key))
+
+    def store_band_levels(self, key, levels, hop_seconds):
+        if key not in self.band_levels:
+            return  # Cleared while it was being analyzed
+        self.band_levels[key] = (levels, hop_seconds)
+        if key == self.current_key:
+            self.update_rta()
+
+    def update_rta(self, current_time=None):
+        if self.rta_window is None or not self.rta_window.isVisible():
+            return
+        analyzed = self.band_levels.get(self.current_key)
+        if analyzed is None or not len(analyzed[0]):
+            self.rta_window.canvas.clear_levels()
+            return
+        if current_time is None:
+            current_time = self.engine.position()
+        levels, hop_seconds = analyzed
+        # The playhead is on the aligned timeline, the levels are indexed by time in the recording itself
+        frame = int((current_time + self.engine.offset()) / hop_seconds)
+        self.rta_window.canvas.show_levels(levels[min(max(frame, 0), len(levels) - 1)])
+
+    def compute_difference(self):
+        checked = [item for item in self.flatten_tree(selected_only=True) if item.childCount() == 0]
+        if len(checked) != 2:
+            QMessageBox.warning(self, "Warning", "Check exactly two recordings to compute their difference.")
+            return
+        keys = [f"{item.parent().text(0)}_{item.text(0)}" for item in checked]
+        reference, take = (self.audio_store.get(key) for key in keys)
+        # The take is read this many samples later so both line up on the aligned timeline
+        lag = round((self.engine.offset(keys[1]) - self.engine.offset(keys[0])) * reference.sr)
+        display_name = f"{checked[0].text(0)} minus {checked[1].text(0)}"
+        self.difference_relay.submit((keys[0], display_name, reference.sr), thread_pool(), null_test,
+                                     reference.data, take.data, lag, reference.sr)
+
+    def add_difference(self, tag, result):
+        reference_key, display_name, sr = tag
+        residual, gain, depths = result
+        folder_items = self.fileTreeWidget.findItems(DIFFERENCE_FOLDER, Qt.MatchExactly)
+        if folder_items:
+            folder_item = folder_items[0]
+        else:
+            folder_item = QTreeWidgetItem([DIFFERENCE_FOLDER])
+            self.fileTreeWidget.addTopLevelItem(folder_item)
+            folder_item.setExpanded(True)
+
+        unique_key = f"{DIFFERENCE_FOLDER}_{display_name}"
+        item = self.tree_items.get(unique_key)
+        if item is None:
+            item = QTreeWidgetItem([display_name])
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(0, Qt.Unchecked)
+            folder_item.addChild(item)
+            self.tree_items[unique_key] = item
+        summary = format_summary(gain, depths)
+        item.setToolTip(0, summary)
+
+        # The residual sits on the reference's timeline, so it shares its offset
+        self.waveformCanvas.discard(unique_key)
+        self.spectrogramCanvas.discard_source(unique_key)
+        self.frame_spectra_cache.pop(unique_key, None)
+        self.audio_store.add(unique_key, None, residual, sr)
+        self.engine.add_source(unique_key, residual, sr)
+        self.engine.set_offset(unique_key, self.engine.offset(reference_key))
+        self.band_levels.pop(unique_key, None)
+        if self.rta_button.isChecked():
+            self.request_band_levels()
+        self.display_selected_waveform(item, reset_loop_points=False)
+        QMessageBox.information(self, "Difference", f"{display_name}\n\nResidual energy by octave band:\n{summary}")
 
     def toggle_waveform(self):
-        if not self.waveform_data:
+        if not len(self.audio_store):
             return
 
         # Check for selected items
@@ -528,99 +964,111 @@ class MusicPlayer(QWidget):
             # If a folder is selected, do nothing
             return
 
-        # Save the current position and playback state
-        self.playback_position = self.mediaPlayer.position()
-        self.is_playing = (self.mediaPlayer.state() == QMediaPlayer.PlayingState)
-
         display_folder_name = parent.text(0)
         display_name = item.text(0)
 
-        # Use the unique key to get the actual file path
+        # Recordings and derived audio such as differences are all looked up by the unique key
         unique_key = f"{display_folder_name}_{display_name}"
-        file_path = self.file_path_dict.get(unique_key)
-
-        if file_path:
-            for index, (y, sr, key) in enumerate(self.waveform_data):
-                if key == unique_key:
-                    previous_waveform = self.current_waveform
-                    self.current_waveform = index
-                    old_duration = librosa.get_duration(y=self.waveform_data[previous_waveform][0], sr=self.waveform_data[previous_waveform][1])
-                    new_duration = librosa.get_duration(y=y, sr=sr)
-                    if old_duration != new_duration and reset_loop_points:
-                        self.waveformCanvas.reset_loop_points()
-                    self.load_and_adjust_waveform(y, sr, file_path, display_name, display_folder_name)
-
-                    # Update the current file type
-                    self.current_file_type = display_name
-                    break
+
+        entry = self.audio_store.get(unique_key)
+        if entry is not None:
+            self.current_key = unique_key
+            self.load_and_adjust_waveform(self.audio_store.samples(unique_key), entry.sr, unique_key, display_name, display_folder_name)
+
+            # Update the current file type
+            self.current_file_type = display_name
 
         if reset_loop_points:
             self.waveformCanvas.reset_loop_points()  # Reset loop points every time an item is clicked
     def set_loop_points(self, start, end):
-        duration = self.waveformCanvas.ax.get_xlim()[1]
-        self.loop_start = max(0, min(start, duration))
-        self.loop_end = max(0, min(end, duration))
+        first, last = self.waveformCanvas.ax.get_xlim()
+        self.loop_start = max(first, min(start, last))
+        self.loop_end = max(first, min(end, last))
+        self.engine.set_loop(min(self.loop_start, self.loop_end), max(self.loop_start, self.loop_end))
+        self.update_loop_spectrum(min(self.loop_start, self.loop_end), max(self.loop_start, self.loop_end))
+
+    def update_loop_spectrum(self, start, end):
+        if self.frame_spectra is None:
+            return
+        if end - start >= self.frame_spectra.entry.duration:
+            # A full-length region is no selection at all
+            self.frame_spectra.set_range(0, 0)  # Blocks still on their way must not bring the curve back
+            self.loopSpectrumCleared.emit()
+            return
+        # The region is on the aligned timeline, the spectra are indexed by time in the recording
+        offset = self.engine.offset(self.frame_spectra.entry.key)
+        spectrum = self.frame_spectra.region_spectrum(start + offset, end + offset)
+        spectra = self.frame_spectra
+        for index in spectra.take_wanted():
+            self.loop_block_relay.submit((spectra, index), thread_pool(), spectra.compute_block, index)
+        if spectrum is not None:  # Otherwise the previous curve stays up until the first block arrives
+            self.loopSpectrumChanged.emit(f"Loop: {self.current_file_type}", *spectrum)
+
+    def loop_block_ready(self, tag, power):
+        spectra, index = tag
+        if spectra.add_block(index, power) and spectra is self.frame_spectra:
+            spectrum = spectra.spectrum()
+            if spectrum is not None:
+                self.loopSpectrumChanged.emit(f"Loop: {self.current_file_type}", *spectrum)
 
+    def loop_block_failed(self, tag, error):
+        spectra, index = tag
+        spectra.block_failed(index)
+        print(f"Loop spectrum failed for {spectra.entry.key}: {error}")
 
 
 
     def highlight_current_file(self):
-        if self.waveform_data:
-            current_file = os.path.basename(self.waveform_data[self.current_waveform][2]).split('.')[0].upper()
-            current_folder = os.path.basename(os.path.dirname(self.waveform_data[self.current_waveform][2]))
-            items = self.fileTreeWidget.findItems(current_file, Qt.MatchRecursive)
-            for item in items:
-                if item.parent() and item.parent().text(0) == current_folder:
-                    self.fileTreeWidget.setCurrentItem(item)
-                    self.fileTreeWidget.scrollToItem(item)
-                    break
+        item = self.tree_items.get(self.current_key)
+        if item is not None:
+            self.fileTreeWidget.setCurrentItem(item)
+            self.fileTreeWidget.scrollToItem(item)
+
+    def buffer_evicted(self, unique_key, mapped_data):
+        # Drop every in-memory reference so the decoded buffer can actually be freed
+        entry = self.audio_store.get(unique_key)
+        self.engine.add_source(unique_key, mapped_data, entry.sr)
 
 
     def play_pause(self):
-        if self.mediaPlayer.state() == QMediaPlayer.PlayingState:
-            self.mediaPlayer.pause()
+        if self.engine.playing:
+            self.engine.pause()
         else:
-            self.mediaPlayer.setVolume(100)  # Ensure volume is at 100% before playing
-            self.mediaPlayer.play()
-            self.timer.start()
+            self.engine.play()
 
 
     def set_position_from_click(self, time_in_seconds):
-        position = int(time_in_seconds * 1000)  # Convert to milliseconds
-        self.mediaPlayer.setPosition(position)
+        if time_in_seconds is not None:
+            self.engine.seek(time_in_seconds)
 
-    def update_time(self):
-        current_position = self.mediaPlayer.position()
-        seconds = current_position // 1000
+    def update_time(self, current_time=None):
+        if current_time is None:
+            current_time = self.engine.position()
+        seconds = int(current_time)
         minutes = seconds // 60
         seconds = seconds % 60
         time_format = f"{minutes:02}:{seconds:02}"
 
-        duration = self.mediaPlayer.duration()
-        total_seconds = duration // 1000
+        total_seconds = int(self.engine.duration())
         total_minutes = total_seconds // 60
         total_seconds = total_seconds % 60
         total_time_format = f"{total_minutes:02}:{total_seconds:02}"
 
         self.label.setText(f"{time_format}/{total_time_format}")
 
-        current_time = current_position / 1000.0  # Convert to seconds
-        self.waveformCanvas.update_line(current_time)
-        
-        # Check if we need to loop
-        if current_time >= self.loop_end:
-            self.mediaPlayer.setPosition(int(self.loop_start * 1000))
+        # Looping is handled sample-accurately inside the engine
+        if self.viewStack.currentWidget() is self.spectrogramCanvas:
+            self.spectrogramCanvas.update_line(current_time)
+        else:
+            self.waveformCanvas.update_line(current_time)
+        self.update_rta(current_time)
 
-    def update_button_text(self, state):
-        if (state == QMediaPlayer.PlayingState):
+    def update_button_text(self, playing):
+        if playing:
             self.playButton.setText("Pause")
         else:
             self.playButton.setText("Play")
 
-    def check_loop(self, state):
-        if (state == QMediaPlayer.StoppedState):
-            self.mediaPlayer.setPosition(int(self.loop_start * 1000))
-            self.mediaPlayer.play()
     def filter_pink_noise(self):
         root = self.fileTreeWidget.invisibleRootItem()
         stack = [root]
@@ -690,21 +1138,30 @@ class MusicPlayer(QWidget):
     def clear(self):
         try:
             # Clear waveform data
-            self.waveform_data.clear()
+            self.audio_store.clear()
+            self.tree_items.clear()
+            self.current_key = None
+            self.frame_spectra = None
+            self.frame_spectra_cache.clear()
+            self.alignment_references.clear()
+            self.aligner.reset()
+            self.loudness.reset()
+            self.resampler.reset()
+            self.loopSpectrumCleared.emit()
 
             # Clear file tree widget
             self.fileTreeWidget.clear()
 
             # Clear waveform canvas
-            self.waveformCanvas.ax.clear()
+            self.waveformCanvas.clear_waveform()
             self.waveformCanvas.draw_idle()
+            self.spectrogramCanvas.clear()
 
             # Reset loop points
             self.waveformCanvas.reset_loop_points()
 
-            # Stop and reset media player
-            self.mediaPlayer.stop()
-            self.mediaPlayer.setMedia(QMediaContent())  # Reset the media content
+            # Stop the engine and release its sources
+            self.engine.clear_sources()
 
             # Reset playback state
             self.playback_position = 0
@@ -723,19 +1180,40 @@ class MusicPlayer(QWidget):
 
             # Clear the file path dictionary
             self.file_path_dict.clear()
+            self.loudness_values.clear()
+            if self.stats_window is not None:
+                self.stats_window.clear()
+            self.band_levels.clear()
+            if self.rta_window is not None:
+                self.rta_window.canvas.clear_levels()
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"An error occurred while clearing data: {e}")
 
     def clear_all_files(self):
-        self.waveform_data.clear()
+        self.audio_store.clear()
+        self.tree_items.clear()
+        self.current_key = None
+        self.frame_spectra = None
+        self.frame_spectra_cache.clear()
+        self.alignment_references.clear()
+        self.aligner.reset()
+        self.loudness.reset()
+        self.resampler.reset()
+        self.loopSpectrumCleared.emit()
         self.fileTreeWidget.clear()
-        self.waveformCanvas.ax.clear()
+        self.waveformCanvas.clear_waveform()
         self.waveformCanvas.draw()
-        self.mediaPlayer.setMedia(QMediaContent())
+        self.spectrogramCanvas.clear()
+        self.engine.clear_sources()
         self.label.setText("00:00/00:00")
         self.loop_start = 0
         self.loop_end = 0
+        if self.stats_window is not None:
+            self.stats_window.clear()
+        self.band_levels.clear()
+        if self.rta_window is not None:
+            self.rta_window.canvas.clear_levels()
 
 
 
@@ -0,0 +1,158 @@
+import os
+import numpy as np
+import scipy.signal
+import soundfile as sf
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtWidgets import QWidget, QVBoxLayout
+from AnalysisCache import cache_path, file_hash
+from BackgroundTasks import TaskRelay, process_pool, thread_pool
+from Spectrogram import stft_power
+from Fonts import MATPLOTLIB_FONT
+
+RTA_NFFT = 8192  # Enough resolution to separate the 25 Hz band
+RTA_HOP_SECONDS = 0.02
+FRAMES_PER_READ = 512
+BAND_CENTERS = 1000 * 2.0 ** (np.arange(-16, 14) / 3)  # Third-octave bands from 25 Hz to 20 kHz
+BAND_LABELS = ['25', '31.5', '40', '50', '63', '80', '100', '125', '160', '200', '250', '315', '400', '500', '630',
+               '800', '1k', '1.25k', '1.6k', '2k', '2.5k', '3.15k', '4k', '5k', '6.3k', '8k', '10k', '12.5k', '16k', '20k']
+LEVEL_FLOOR = -100.0
+
+
+def band_matrix(sr, nfft):
+    """(bins, bands) weights that sum FFT bin power into third-octave bands."""
+    freqs = np.fft.rfftfreq(nfft, 1 / sr)
+    low = BAND_CENTERS * 2 ** (-1 / 6)
+    high = BAND_CENTERS * 2 ** (1 / 6)
+    return ((freqs[:, None] >= low) & (freqs[:, None] < high)).astype(np.float32)
+
+
+def band_levels(blocks, sr, hop):
+    """Third-octave band levels in dB, one row per hop, from consecutive overlapping blocks.
+
+    Each block must start `FRAMES_PER_READ` hops after the previous one and
+    overlap it by one FFT length minus a hop, so the frames tile the signal.
+    Levels read 0 dB for a full-scale sine.
+    """
+    window = scipy.signal.get_window('hann', RTA_NFFT)
+    bandwidth = RTA_NFFT * np.sum(window ** 2) / np.sum(window) ** 2  # Energy bandwidth of the window in bins
+    weights = band_matrix(sr, RTA_NFFT) / np.float32(bandwidth)
+    levels = []
+    for block in blocks:
+        power = stft_power(block, RTA_NFFT, hop)
+        if len(power):
+            with np.errstate(divide='ignore'):
+                levels.append(np.maximum(10 * np.log10(power @ weights), LEVEL_FLOOR).astype(np.float32))
+    return np.concatenate(levels) if levels else np.zeros((0, len(BAND_CENTERS)), dtype=np.float32)
+
+
+def hop_length(sr):
+    return int(round(RTA_HOP_SECONDS * sr))
+
+
+def analyze_file(path):
+    # Runs inside the process pool and reads the file block by block
+    sr = sf.info(path).samplerate
+    hop = hop_length(sr)
+    blocks = (block.T for block in sf.blocks(path, blocksize=hop * (FRAMES_PER_READ - 1) + RTA_NFFT,
+                                              overlap=RTA_NFFT - hop, dtype='float32', always_2d=True))
+    return band_levels(blocks, sr, hop), hop / sr
+
+
+def analyze_samples(data, sr):
+    # For audio that only exists in memory, such as a difference render
+    data = np.atleast_2d(data)
+    hop = hop_length(sr)
+    step = hop * FRAMES_PER_READ
+    blocks = (data[:, start:start + step - hop + RTA_NFFT] for start in range(0, data.shape[-1], step))
+    return band_levels(blocks, sr, hop), hop / sr
+
+
+class BandAnalyzer(QObject):
+    """Background, cached third-octave band levels for whole recordings."""
+
+    analyzed = pyqtSignal(str, object, float)  # key, (frames, bands) levels in dB, seconds per frame
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.relay = TaskRelay(self)
+        self.relay.finished.connect(self.store)
+        self.relay.failed.connect(lambda tag, error: print(f"Band analysis failed for {tag[0]}: {error}"))
+
+    def request(self, key, path, entry):
+        if path is None:
+            self.relay.submit((key, None), thread_pool(), analyze_samples, entry.data, entry.sr)
+            return
+        cached = cache_path('rta', f"{file_hash(path)}.npz")
+        if os.path.exists(cached):
+            with np.load(cached) as data:
+                self.analyzed.emit(key, data['levels'], float(data['hop_seconds']))
+        else:
+            self.relay.submit((key, cached), process_pool(), analyze_file, path)
+
+    def store(self, tag, result):
+        key, cached = tag
+        levels, hop_seconds = result
+        if cached is not None:
+            np.savez(cached, levels=levels, hop_seconds=hop_seconds)
+        self.analyzed.emit(key, levels, hop_seconds)
+
+
+class RTACanvas(FigureCanvas):
+    """Bar display of band levels, redrawn by blitting only the bars."""
+
+    def __init__(self, parent=None):
+        self.fig, self.ax = plt.subplots()
+        self.fig.patch.set_facecolor('white')
+        super().__init__(self.fig)
+        self.setParent(parent)
+        positions = np.arange(len(BAND_CENTERS))
+        self.bars = self.ax.bar(positions, np.zeros(len(positions)), bottom=LEVEL_FLOOR, color='#005fb8', animated=True)
+        self.ax.set_xlim(-0.5, len(positions) - 0.5)
+        self.ax.set_ylim(LEVEL_FLOOR, 0)
+        self.ax.set_xticks(positions[1::3])
+        self.ax.set_xticklabels(BAND_LABELS[1::3])
+        self.ax.set_xlabel('Frequency (Hz)', fontproperties=MATPLOTLIB_FONT)
+        self.ax.set_ylabel('Level (dB)', fontproperties=MATPLOTLIB_FONT)
+        for label in self.ax.get_xticklabels() + self.ax.get_yticklabels():
+            label.set_fontproperties(MATPLOTLIB_FONT)
+        self.background = None
+        self.mpl_connect('draw_event', self.on_draw)
+
+    def on_draw(self, event):
+        # Keep the static axes, the bars are drawn over them on every tick
+        self.background = self.copy_from_bbox(self.ax.bbox)
+        self.draw_bars()
+
+    def draw_bars(self):
+        if self.background is None:
+            return
+        self.restore_region(self.background)
+        for bar in self.bars:
+            self.ax.draw_artist(bar)
+        self.blit(self.ax.bbox)
+
+    def show_levels(self, levels):
+        for bar, level in zip(self.bars, levels):
+            bar.set_height(max(float(level), LEVEL_FLOOR) - LEVEL_FLOOR)
+        self.draw_bars()
+
+    def clear_levels(self):
+        self.show_levels(np.full(len(self.bars), LEVEL_FLOOR))
+
+
+class RTAWindow(QWidget):
+    closed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Real-Time Analyzer")
+        self.resize(900, 450)
+        self.canvas = RTACanvas(self)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.canvas)
+
+    def closeEvent(self, event):
+        self.closed.emit()
+        super().closeEvent(event)
@@ -0,0 +1,54 @@
+import os
+from collections import namedtuple
+
+# Root of the Boom/Condenser/Dynamic recordings, HYPERX_LIBRARY_ROOT points the app at another copy
+LIBRARY_ROOT = os.environ.get('HYPERX_LIBRARY_ROOT') or os.path.join(
+    os.path.expanduser('~'), 'Documents', 'Hyper X Intern Project', 'Microphone_Recordings')
+
+CATEGORIES = ["Boom", "Condenser", "Dynamic"]
+GROUPS = ["HyperX", "Competitor"]
+HYPERX_GROUP = "HyperX"
+
+# Fields of each category's HyperX product field, Boom folders have no build
+PRODUCT_FIELDS = {"Boom": ('product', 'sample'), "Condenser": ('product', 'build', 'sample'),
+                  "Dynamic": ('product', 'build', 'sample')}
+
+
+class Recording(namedtuple('Recording', ['category', 'group', 'vendor', 'product', 'build', 'sample',
+                                         'pattern', 'position', 'fx', 'path'])):
+    """One recording folder of the library, parsed once when its folder is listed.
+
+    Competitor folders are Vendor_Product_Pattern_Position[_FX]. HyperX folders
+    pack Product-Sample (Boom) or Product-Build-Sample (Condenser, Dynamic)
+    into their second field. Fields a folder does not have are None.
+    """
+
+    __slots__ = ()
+
+    def tree_path(self):
+        """Branch the recording is listed under in the selection tree."""
+        if self.group == HYPERX_GROUP:
+            fields = (self.product, self.build, self.sample) if self.build is not None else (self.product, self.sample)
+        else:
+            fields = (self.vendor, self.product)
+        levels = (self.category, self.group) + fields + (self.pattern, self.position)
+        return levels + (self.fx,) if self.fx is not None else levels
+
+
+def parse_recording(root, category, group, name):
+    """Recording for the folder `name` under root/category/group, or None if its name does not parse."""
+    parts = name.split('_')
+    if len(parts) < 4:  # At least Vendor_Product_Pattern_Position
+        return None
+    fields = {'build': None, 'sample': None}
+    if group == HYPERX_GROUP:
+        product_fields = PRODUCT_FIELDS.get(category, ())
+        product_parts = parts[1].split('-')
+        if len(product_parts) != len(product_fields):
+            return None
+        fields.update(zip(product_fields, product_parts))
+    else:
+        fields['product'] = parts[1]
+    return Recording(category, group, parts[0], fields['product'], fields['build'], fields['sample'],
+                     parts[2], parts[3], parts[4] if len(parts) > 4 else None,
+                     os.path.join(root, category, group, name))
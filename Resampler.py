@@ -0,0 +1,67 @@
+import os
+import numpy as np
+import scipy.signal
+import soundfile as sf
+from fractions import Fraction
+from AnalysisCache import cache_path, file_hash
+from BackgroundTasks import process_pool, thread_pool
+
+
+def read_audio(path):
+    """Float32 samples shaped like librosa's, (channels, frames) or (frames,) for mono, and the file rate."""
+    y, sr = sf.read(path, dtype='float32', always_2d=True)
+    y = np.ascontiguousarray(y.T)
+    return (y[0] if y.shape[0] == 1 else y), sr
+
+
+def resampled_path(path, rate):
+    return cache_path('resampled', f"{file_hash(path)}_{int(rate)}.npy")
+
+
+def resample_to_cache(path, rate):
+    """Convert a recording to `rate` once and keep the result in the disk cache."""
+    target = resampled_path(path, rate)
+    if not os.path.exists(target):
+        y, sr = read_audio(path)
+        ratio = Fraction(int(rate), int(sr))  # e.g. 44.1 kHz -> 48 kHz is up 160, down 147
+        y = scipy.signal.resample_poly(y, ratio.numerator, ratio.denominator, axis=-1).astype(np.float32)
+        temp_path = target + '.tmp'
+        with open(temp_path, 'wb') as handle:
+            np.save(handle, y)
+        os.replace(temp_path, target)
+    return target
+
+
+class Resampler:
+    """Loads recordings at one session sample rate.
+
+    The session rate is that of the first file loaded unless given. Files at
+    another rate are converted with polyphase resampling in the process pool and
+    cached on disk by (file hash, rate), so a later session only reads them back.
+    """
+
+    def __init__(self, rate=None):
+        self.rate = rate
+
+    def load(self, paths):
+        """Samples of every path at the session rate, in order, decoded in parallel."""
+        if not paths:
+            return []
+        if self.rate is None:
+            self.rate = sf.info(paths[0]).samplerate
+        native = [sf.info(path).samplerate == self.rate for path in paths]
+
+        # Fill the cache for everything that still needs converting before reading anything back
+        conversions = [process_pool().submit(resample_to_cache, path, self.rate)
+                       for path, is_native in zip(paths, native)
+                       if not is_native and not os.path.exists(resampled_path(path, self.rate))]
+        for future in conversions:
+            future.result()
+
+        reads = [thread_pool().submit(read_audio, path) if is_native
+                 else thread_pool().submit(np.load, resampled_path(path, self.rate))
+                 for path, is_native in zip(paths, native)]
+        return [future.result()[0] if is_native else future.result() for future, is_native in zip(reads, native)]
+
+    def reset(self):
+        self.rate = None
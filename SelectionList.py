@@ -0,0 +1,42 @@
+import bisect
+
+
+class SelectionList:
+    """Checked folder paths shown in a QListWidget, kept sorted and updated row by row.
+
+    Rows are found by bisecting the sorted paths, so checking or unchecking
+    one folder touches one row however many are selected. A delta larger
+    than the list itself is cheaper to show by refilling it.
+    """
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.paths = []
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __contains__(self, path):
+        row = bisect.bisect_left(self.paths, path)
+        return row < len(self.paths) and self.paths[row] == path
+
+    def update(self, added, removed):
+        if len(added) + len(removed) > len(self.paths):
+            self.paths = sorted(set(self.paths).difference(removed).union(added))
+            self.widget.clear()
+            self.widget.addItems(self.paths)
+            return
+        for path in removed:
+            row = bisect.bisect_left(self.paths, path)
+            if row < len(self.paths) and self.paths[row] == path:
+                del self.paths[row]
+                self.widget.takeItem(row)
+        for path in added:
+            row = bisect.bisect_left(self.paths, path)
+            if row == len(self.paths) or self.paths[row] != path:
+                self.paths.insert(row, path)
+                self.widget.insertItem(row, path)
+
+    def clear(self):
+        self.paths = []
+        self.widget.clear()
@@ -0,0 +1,234 @@
+import collections
+import numpy as np
+import scipy.fft
+import scipy.signal
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from BackgroundTasks import TaskRelay, thread_pool
+from Fonts import MATPLOTLIB_FONT
+
+DEFAULT_NFFT = 2048
+MIN_HOP = 256
+TILE_FRAMES = 256  # STFT columns per cached tile
+TARGET_COLUMNS = 2048  # The hop is coarsened when zoomed out so the view never needs more columns than this
+TILE_CACHE_BYTES = 256 * 1024 ** 2
+DB_FLOOR = -100.0
+ZOOM_STEP = 0.8
+
+
+def frame_count(frames, nfft, hop):
+    return max(0, (frames - nfft) // hop + 1)
+
+
+def tile_span(tile, nfft, hop):
+    """Sample range a tile needs: its first frame start to its last frame end."""
+    start = tile * TILE_FRAMES * hop
+    return start, start + (TILE_FRAMES - 1) * hop + nfft
+
+
+def stft_power(samples, nfft, hop):
+    """Power spectra (columns, bins) of Hann-windowed frames of a sample slice.
+
+    The frames are strided views into the slice, so only the windowed frames are
+    ever materialised, and channels are combined by averaging their power.
+    A full-scale sine reads as unit power.
+    """
+    samples = np.atleast_2d(samples)
+    if samples.shape[-1] < nfft:
+        return np.zeros((0, nfft // 2 + 1), dtype=np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(samples, nfft, axis=-1)[:, ::hop, :]
+    window = scipy.signal.get_window('hann', nfft).astype(np.float32)
+    spectrum = scipy.fft.rfft(frames * window, axis=-1)
+    return (np.mean(np.abs(spectrum) ** 2, axis=0) / (window.sum() ** 2 / 4)).astype(np.float32)
+
+
+def tile_magnitude(samples, nfft, hop):
+    """dB magnitude (bins, columns) of the STFT of one tile's samples."""
+    with np.errstate(divide='ignore'):
+        magnitude = 10 * np.log10(stft_power(samples, nfft, hop))
+    return np.maximum(magnitude, DB_FLOOR).T.astype(np.float32)
+
+
+class TileCache:
+    """LRU cache of magnitude tiles keyed by (source key, FFT size, hop, tile index)."""
+
+    def __init__(self, max_bytes=TILE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.tiles = collections.OrderedDict()
+        self.bytes = 0
+
+    def get(self, key):
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+        return tile
+
+    def put(self, key, tile):
+        if key in self.tiles:
+            self.bytes -= self.tiles.pop(key).nbytes
+        self.tiles[key] = tile
+        self.bytes += tile.nbytes
+        while self.bytes > self.max_bytes and len(self.tiles) > 1:
+            _, evicted = self.tiles.popitem(last=False)
+            self.bytes -= evicted.nbytes
+
+    def discard_source(self, source_key):
+        for key in [key for key in self.tiles if key[0] == source_key]:
+            self.bytes -= self.tiles.pop(key).nbytes
+
+    def clear(self):
+        self.tiles.clear()
+        self.bytes = 0
+
+
+class SpectrogramCanvas(FigureCanvas):
+    """Spectrogram of the current recording, computed and drawn tile by tile for the visible range."""
+
+    def __init__(self, music_player, parent=None):
+        self.fig, self.ax = plt.subplots()
+        self.fig.patch.set_facecolor('white')
+        super().__init__(self.fig)
+        self.setParent(parent)
+        self.music_player = music_player
+        self.nfft = DEFAULT_NFFT
+        self.cache = TileCache()
+        self.relay = TaskRelay(self)
+        self.relay.finished.connect(self.tile_ready)
+        self.relay.failed.connect(self.tile_failed)
+        self.pending = set()
+        self.generation = 0  # Bumped when cached samples are replaced, tiles of an older generation are dropped
+        self.images = {}  # (hop, tile) -> AxesImage currently on the axes
+        self.key = None
+        self.entry = None
+        self.offset = 0.0  # Alignment offset of the source, tiles are drawn shifted left by it
+        self.current_line = None
+        self.mpl_connect('scroll_event', self.on_scroll)
+        self.mpl_connect('button_press_event', self.on_click)
+        self.ax.axis('off')
+
+    def set_source(self, key, entry, title="", offset=0.0):
+        if key != self.key or offset != self.offset:
+            self.key = key
+            self.entry = entry
+            self.offset = offset
+            self.ax.clear()
+            self.images.clear()
+            self.ax.set_xlim(-offset, entry.duration - offset)
+            self.ax.set_ylim(0, entry.sr / 2)
+            self.ax.set_autoscale_on(False)  # Tiles must not move the view
+            self.ax.set_xlabel('Time (s)', fontproperties=MATPLOTLIB_FONT)
+            self.ax.set_ylabel('Frequency (Hz)', fontproperties=MATPLOTLIB_FONT)
+            for label in self.ax.get_xticklabels() + self.ax.get_yticklabels():
+                label.set_fontproperties(MATPLOTLIB_FONT)
+            self.current_line = self.ax.axvline(0, color='w')
+        self.ax.set_title(title, fontproperties=MATPLOTLIB_FONT)
+        self.refresh()
+
+    def clear_source(self):
+        self.key = None
+        self.entry = None
+        self.offset = 0.0
+        self.ax.clear()
+        self.ax.axis('off')
+        self.images.clear()
+        self.current_line = None
+        self.draw_idle()
+
+    def discard_source(self, key):
+        """Forget the tiles of a source whose samples have been replaced under the same key."""
+        self.cache.discard_source(key)
+        self.forget_pending()
+        if key == self.key:
+            self.clear_source()  # The next set_source draws the new samples from scratch
+
+    def clear(self):
+        self.cache.clear()
+        self.forget_pending()
+        self.clear_source()
+
+    def forget_pending(self):
+        # Tiles still being computed are dropped when they arrive, and requested again if still visible
+        self.generation += 1
+        self.pending.clear()
+
+    def level_hop(self):
+        # Coarser hops when zoomed out keep the column count, and the work, proportional to the screen
+        start, end = self.ax.get_xlim()
+        visible = max(end - start, 0.0) * self.entry.sr
+        hop = MIN_HOP
+        while visible / hop > TARGET_COLUMNS:
+            hop *= 2
+        return hop
+
+    def visible_tiles(self):
+        hop = self.level_hop()
+        tile_seconds = TILE_FRAMES * hop / self.entry.sr
+        start, end = self.ax.get_xlim()
+        start, end = start + self.offset, end + self.offset
+        total = frame_count(self.entry.frames, self.nfft, hop)
+        last_tile = (total - 1) // TILE_FRAMES
+        first = max(0, int(start // tile_seconds))
+        last = min(last_tile, int(end // tile_seconds))
+        return {(hop, tile) for tile in range(first, last + 1)}
+
+    def refresh(self):
+        if self.entry is None:
+            return
+        visible = self.visible_tiles()
+        for level in [level for level in self.images if level not in visible]:
+            self.images.pop(level).remove()
+        for hop, tile in visible:
+            if (hop, tile) in self.images:
+                continue
+            cache_key = (self.key, self.nfft, hop, tile)
+            magnitude = self.cache.get(cache_key)
+            if magnitude is not None:
+                self.draw_tile(hop, tile, magnitude)
+            elif cache_key not in self.pending:
+                self.pending.add(cache_key)
+                first, last = tile_span(tile, self.nfft, hop)
+                samples = self.entry.data[..., first:last]  # A view, read on the worker if memory-mapped
+                self.relay.submit((self.generation, cache_key), thread_pool(), tile_magnitude, samples, self.nfft, hop)
+        self.draw_idle()
+
+    def draw_tile(self, hop, tile, magnitude):
+        left = tile * TILE_FRAMES * hop / self.entry.sr - self.offset
+        right = left + magnitude.shape[1] * hop / self.entry.sr
+        self.images[(hop, tile)] = self.ax.imshow(
+            magnitude, origin='lower', aspect='auto', interpolation='nearest', cmap='magma',
+            vmin=DB_FLOOR, vmax=0, extent=(left, right, 0, self.entry.sr / 2), zorder=0)
+
+    def tile_ready(self, tag, magnitude):
+        generation, cache_key = tag
+        if generation != self.generation:
+            return
+        self.pending.discard(cache_key)
+        self.cache.put(cache_key, magnitude)
+        if cache_key[0] == self.key:
+            self.refresh()
+
+    def tile_failed(self, tag, error):
+        generation, cache_key = tag
+        print(f"Spectrogram tile failed for {cache_key[0]}: {error}")
+        if generation == self.generation:
+            self.pending.discard(cache_key)
+
+    def on_scroll(self, event):
+        if self.entry is None or event.xdata is None:
+            return
+        start, end = self.ax.get_xlim()
+        factor = ZOOM_STEP if event.button == 'up' else 1 / ZOOM_STEP
+        start = event.xdata - (event.xdata - start) * factor
+        end = event.xdata + (end - event.xdata) * factor
+        self.ax.set_xlim(max(-self.offset, start), min(self.entry.duration - self.offset, end))
+        self.refresh()
+
+    def on_click(self, event):
+        if event.inaxes == self.ax and event.button == 1 and event.xdata is not None:
+            self.update_line(event.xdata)
+            self.music_player.set_position_from_click(event.xdata)
+
+    def update_line(self, current_time):
+        if self.current_line:
+            self.current_line.set_xdata([current_time])
+            self.draw_idle()
@@ -1,25 +1,13 @@
-import os
 import sys
 from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QLabel, QScrollArea, QFrame, QTreeWidget, QTreeWidgetItem, QHBoxLayout
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont, QBrush, QColor
 from ToggleButton import ToggleStack  # Import the ToggleStack class
 from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QLabel, QScrollArea, QFrame, QTreeWidget, QTreeWidgetItem, QHBoxLayout, QListWidget
+from Catalog import shared_catalog
 
-# Reads in folder names and establishes necessary lists
+# Folder of Company_Model_Pattern_Position_Config comparison folders
 path = 'C:\\Users\\TaRi525\\Documents\\Hyper X Intern Project\\GeneratedFolders'
-try:
-    names = os.listdir(path)
-except Exception as e:
-    print(f"Error reading directory: {e}")
-    names = []
-
-info = [name.split('_') for name in names]
-hyperx_microphones = [thing for thing in info if thing[0] == "HyperX"]
-competitor_microphones = [thing for thing in info if thing[0] != "HyperX"]
-
-hyperx_microphones.sort()
-competitor_microphones.sort()
 
 # Main window class
 class ScrollWindow(QWidget):
@@ -29,6 +17,9 @@ class ScrollWindow(QWidget):
         self.setWindowTitle("HyperX Microphone Comparisons")
         self.setGeometry(100, 100, 2000, 1600)
 
+        # Folder names are parsed once into an index shared with the other selection windows
+        self.catalog = shared_catalog(path)
+
         main_layout = QHBoxLayout()
         self.setLayout(main_layout)
 
@@ -167,7 +158,7 @@ class ScrollWindow(QWidget):
         hyperx_title.setCheckState(0, Qt.Unchecked)
         self.hyperx_tree.addTopLevelItem(hyperx_title)
 
-        self.add_microphone_items(hyperx_title, hyperx_microphones, hyperx_font)
+        self.add_microphone_items(hyperx_title, self.catalog.hyperx_records(), hyperx_font)
 
         # Competitor section
         self.competitor_tree = QTreeWidget()
@@ -193,7 +184,7 @@ class ScrollWindow(QWidget):
         competitor_title.setCheckState(0, Qt.Unchecked)
         self.competitor_tree.addTopLevelItem(competitor_title)
 
-        self.add_microphone_items(competitor_title, competitor_microphones, competitor_font)
+        self.add_microphone_items(competitor_title, self.catalog.competitor_records(), competitor_font)
 
         self.scroll_layout.addWidget(self.hyperx_tree)
         self.scroll_layout.addWidget(self.competitor_tree)
@@ -246,8 +237,8 @@ class ScrollWindow(QWidget):
     def add_pattern_items(self, font):
         patterns = {}
 
-        # Combine hyperx_microphones and competitor_microphones
-        all_microphones = hyperx_microphones + competitor_microphones
+        # HyperX folders first, then the competitors
+        all_microphones = self.catalog.hyperx_records() + self.catalog.competitor_records()
 
         for mic in all_microphones:
             pattern = mic[2]
@@ -304,8 +295,8 @@ class ScrollWindow(QWidget):
     def add_effects_items(self, font):
         effects = {}
 
-        # Combine hyperx_microphones and competitor_microphones
-        all_microphones = hyperx_microphones + competitor_microphones
+        # HyperX folders first, then the competitors
+        all_microphones = self.catalog.hyperx_records() + self.catalog.competitor_records()
 
         for mic in all_microphones:
             effect = mic[4]  # Assuming 'config' represents the effect
@@ -0,0 +1,162 @@
+import os
+import struct
+import argparse
+import threading
+from AnalysisCache import JsonCache
+from BackgroundTasks import thread_pool
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+SUPPORTED_FORMATS = {WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT}
+AUDIO_FILES = ["MALE.wav", "FEMALE.wav", "PINKNOISE.wav"]  # What a comparison folder must contain
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def parse_wav_header(path):
+    """Format, rate, channels, frames and data offset of a WAV file from its chunk headers alone.
+
+    Only the RIFF header and the chunk headers up to the data chunk are read,
+    so this costs a few small reads whatever the length of the recording.
+    Files that cannot be played are returned with 'valid' False and a reason.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as handle:
+        riff = handle.read(12)
+        if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'WAVE':
+            return {'valid': False, 'error': "not a RIFF/WAVE file"}
+        fmt = None
+        while True:
+            header = handle.read(8)
+            if len(header) < 8:
+                return {'valid': False, 'error': "no data chunk" if fmt else "no fmt chunk"}
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                body = handle.read(chunk_size)
+                if len(body) < 16:
+                    return {'valid': False, 'error': "short fmt chunk"}
+                format_tag, channels, sample_rate, _, block_align, bits = struct.unpack('<HHIIHH', body[:16])
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    format_tag = struct.unpack('<H', body[24:26])[0]  # First two bytes of the sub-format GUID
+                fmt = (format_tag, channels, sample_rate, block_align, bits)
+                handle.seek(chunk_size & 1, os.SEEK_CUR)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    return {'valid': False, 'error': "data before fmt chunk"}
+                data_offset = handle.tell()
+                break
+            else:
+                handle.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)  # Chunks are word aligned
+
+    format_tag, channels, sample_rate, block_align, bits = fmt
+    if format_tag not in SUPPORTED_FORMATS or channels == 0 or sample_rate == 0 or block_align == 0:
+        return {'valid': False, 'error': f"unsupported format {format_tag:#06x}"}
+    data_size = min(chunk_size, size - data_offset)  # A truncated file is played up to what is there
+    frames = data_size // block_align
+    return {
+        'valid': frames > 0,
+        'error': None if frames > 0 else "no audio frames",
+        'format': format_tag,
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'bits': bits,
+        'block_align': block_align,
+        'frames': frames,
+        'data_offset': data_offset,
+        'data_size': data_size,
+        'duration': frames / sample_rate,
+        'truncated': data_size < chunk_size,
+    }
+
+
+class WavIndex:
+    """Persistent header metadata for every WAV in the recording library.
+
+    Entries are keyed by absolute path and reparsed only when the file's size
+    or modification time changes, so durations and validity are available
+    anywhere in the app without decoding audio.
+    """
+
+    def __init__(self):
+        self.cache = JsonCache('wav_index')
+
+    def save(self):
+        self.cache.save()
+
+    def info(self, path, save=True, stamp=None):
+        # A [size, mtime_ns] stamp from the folder catalog saves a stat per file
+        path = os.path.abspath(path)
+        if stamp is None:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return {'valid': False, 'error': "missing"}
+            stamp = [stat.st_size, stat.st_mtime_ns]
+        stamp = list(stamp)
+        entry = self.cache.get(path)
+        if entry is None or entry['stamp'] != stamp:
+            try:
+                info = parse_wav_header(path)
+            except OSError as e:
+                info = {'valid': False, 'error': str(e)}
+            entry = {'stamp': stamp, 'info': info}
+            self.cache.put(path, entry)
+            if save:
+                self.save()
+        return entry['info']
+
+    def duration(self, path):
+        return self.info(path).get('duration', 0.0)
+
+    def is_valid(self, path):
+        return self.info(path)['valid']
+
+    def folder_status(self, folder_path, save=True, stamps=None):
+        """Comparison files of a folder that are missing or unplayable, mapped to the reason.
+
+        `stamps` maps the file names known to be in the folder to their stamps,
+        as stored by the folder catalog; without it every file is stat'ed.
+        """
+        problems = {}
+        for file_name in AUDIO_FILES:
+            if stamps is not None and file_name not in stamps:
+                problems[file_name] = "missing"
+                continue
+            info = self.info(os.path.join(folder_path, file_name), save=False,
+                             stamp=stamps[file_name] if stamps is not None else None)
+            if not info['valid']:
+                problems[file_name] = info['error']
+        if save:
+            self.save()
+        return problems
+
+    def scan(self, root):
+        """Index every WAV under root in parallel and return path -> info."""
+        paths = []
+        for directory, _, files in os.walk(root):
+            paths.extend(os.path.join(directory, name) for name in files if name.lower().endswith('.wav'))
+        results = dict(zip(paths, thread_pool().map(lambda path: self.info(path, save=False), paths)))
+        self.save()
+        return results
+
+
+def wav_index():
+    # One index per process, shared by the player and the selection windows
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = WavIndex()
+        return _index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index the headers of every WAV under a folder")
+    parser.add_argument('root')
+    args = parser.parse_args()
+    for path, info in sorted(wav_index().scan(args.root).items()):
+        if info['valid']:
+            print(f"{info['duration']:8.2f} s {info['sample_rate']:6d} Hz {info['channels']} ch  {path}")
+        else:
+            print(f"{'invalid':>8}   {info['error']:<24}  {path}")
@@ -23,6 +23,8 @@ class MainWindow(QMainWindow):
         self.scroll_window = ScrollWindow()
         self.wav = WaveWindow()
         self.csv = CSVGrapher()
+        self.wav.player.loopSpectrumChanged.connect(self.csv.show_temporary_curve)
+        self.wav.player.loopSpectrumCleared.connect(self.csv.clear_temporary_curve)
         
         # Set size policy for scroll_window to expand vertically
         self.scroll_window.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Expanding)
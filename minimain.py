@@ -5,6 +5,7 @@ from PyQt5.QtGui import QFont
 from QTFqRes import CSVGrapher
 from QTWaveform import MusicPlayer
 from FolderSelectionDialog import FolderSelectionDialog
+from WavIndex import wav_index, AUDIO_FILES
 
 class MainGUI(QMainWindow):
     def __init__(self, folder_paths):
@@ -27,6 +28,10 @@ class MainGUI(QMainWindow):
         self.csv_grapher = CSVGrapher(self)
         self.music_player = MusicPlayer(self)
 
+        # Overlay the averaged spectrum of the loop region on the response graph
+        self.music_player.loopSpectrumChanged.connect(self.csv_grapher.show_temporary_curve)
+        self.music_player.loopSpectrumCleared.connect(self.csv_grapher.clear_temporary_curve)
+
         # Stack the CSVGrapher and MusicPlayer vertically
         self.stacked_layout = QVBoxLayout()
         self.stacked_layout.setContentsMargins(5, 5, 5, 5)  # Adjust margins
@@ -59,23 +64,26 @@ class MainGUI(QMainWindow):
             QMessageBox.warning(self, "Warning", f"The folder {folder_path} has already been added.")
             return
 
-        required_files = ["FRQ.csv"]
-        audio_files = ["MALE.wav", "FEMALE.wav", "PINKNOISE.wav"]
         folder_name = os.path.basename(folder_path)
 
-        for file_name in required_files:
-            file_path = os.path.join(folder_path, file_name)
-            if not os.path.isfile(file_path):
-                QMessageBox.critical(self, "Error", f"Missing {file_name} in {folder_name}")
-                return
-
-        self.csv_grapher.load_csv(os.path.join(folder_path, "FRQ.csv"), folder_name)
+        # Prefer the measured FRQ.csv, otherwise derive the response from the pink-noise recording
+        frq_path = os.path.join(folder_path, "FRQ.csv")
+        pink_noise_path = os.path.join(folder_path, "PINKNOISE.wav")
+        if os.path.isfile(frq_path):
+            self.csv_grapher.load_csv(frq_path, folder_name)
+        elif wav_index().is_valid(pink_noise_path):
+            self.csv_grapher.load_pink_noise(pink_noise_path, folder_name)
+        else:
+            QMessageBox.critical(self, "Error", f"Missing FRQ.csv and PINKNOISE.wav in {folder_name}")
+            return
 
-        audio_paths = [os.path.join(folder_path, file_name) for file_name in audio_files]
-        missing_files = [file_name for file_name, path in zip(audio_files, audio_paths) if not os.path.isfile(path)]
+        # Header-only check, so a broken recording is reported before anything is decoded
+        audio_paths = [os.path.join(folder_path, file_name) for file_name in AUDIO_FILES]
+        problems = wav_index().folder_status(folder_path)
         
-        if missing_files:
-            QMessageBox.critical(self, "Error", f"Missing audio files in {folder_name}: {', '.join(missing_files)}")
+        if problems:
+            details = ', '.join(f"{file_name} ({reason})" for file_name, reason in problems.items())
+            QMessageBox.critical(self, "Error", f"Missing or unreadable audio files in {folder_name}: {details}")
         else:
             self.music_player.open_files(audio_paths, folder_name)
 